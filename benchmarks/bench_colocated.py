@@ -0,0 +1,157 @@
+"""
+Benchmark - remote (A2A over HTTP) vs colocated (in-process) expert calls
+
+Measures what the manager -> worker hop costs, by running the same
+delegation through `delegate_to_expert` both ways:
+
+- "remote": the Tech worker is served over HTTP on its port (8001) in this
+  process, and the manager calls it through its pooled A2A client
+- "local": the manager runs the Tech worker's graph in-process, as with
+  LOCAL_EXPERTS=TECH
+
+The worker's LLM is replaced by a stub that streams a fixed answer without
+delay, so the numbers are the protocol overhead alone: sequential latency
+(mean, p50, p95) and throughput at 16 concurrent delegations.
+
+Limitation: in "remote" mode the manager's client and the worker's server
+share this process's single event loop, so they compete for one core and
+the remote req/s figure says nothing about a real deployment, where they
+run in separate processes. Compare the sequential latencies; take the
+remote throughput only as a lower bound.
+
+Usage (with nothing else listening on port 8001):
+    uv run python benchmarks/bench_colocated.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ["LOCAL_EXPERTS"] = ""  # The benchmark switches modes itself
+
+import uvicorn  # noqa: E402
+
+import agent_a_manager as manager  # noqa: E402
+import agent_c_worker as tech_worker  # noqa: E402
+
+ANSWER_TOKENS = 200
+HISTORY_TURNS = [0, 10]
+CALLS = 200
+WARMUP_CALLS = 20
+CONCURRENCY = 16
+
+
+class StubStream:
+    """Streams the answer tokens like an OpenAI chat completion stream."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def __aiter__(self):
+        for i in range(ANSWER_TOKENS):
+            delta = SimpleNamespace(content=f"token{i} ")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+
+
+class StubCompletions:
+    async def create(self, **kwargs):
+        return StubStream()
+
+
+def make_history(turns: int) -> list[dict]:
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"Question number {i} about my API?"})
+        history.append({"role": "assistant", "content": "Use small, well named endpoints. " * 5})
+    return history
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def delegate(i: int, history: list[dict]) -> None:
+    state = {
+        "question": f"How do I version API number {i}?",
+        "context_id": f"bench-{i}",
+        "conversation_history": history,
+        "routed_to": "TECH",
+        "route_source": "local",
+    }
+    await manager.delegate_to_expert(manager.AGENT_C_URL, "Tech Expert", state)
+
+
+async def sequential_ms(history: list[dict]) -> list[float]:
+    for i in range(WARMUP_CALLS):
+        await delegate(i, history)
+    latencies = []
+    for i in range(CALLS):
+        started_at = time.perf_counter()
+        await delegate(i, history)
+        latencies.append((time.perf_counter() - started_at) * 1000)
+    return sorted(latencies)
+
+
+async def concurrent_per_second(history: list[dict]) -> float:
+    window = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(i: int) -> None:
+        async with window:
+            await delegate(i, history)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(CALLS)))
+    return CALLS / (time.perf_counter() - started_at)
+
+
+async def measure(mode: str, history: list[dict]) -> tuple[list[float], float]:
+    manager.local_workers = {manager.AGENT_C_URL: tech_worker} if mode == "local" else {}
+    # Silence the agents' per-request logging while measuring
+    with contextlib.redirect_stdout(io.StringIO()):
+        return await sequential_ms(history), await concurrent_per_second(history)
+
+
+async def main():
+    tech_worker.llm.client = SimpleNamespace(chat=SimpleNamespace(completions=StubCompletions()))
+
+    server = uvicorn.Server(
+        uvicorn.Config(tech_worker.create_app(), host="127.0.0.1", port=8001, log_level="warning")
+    )
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        if serving.done():
+            raise SystemExit("Could not serve the Tech worker on port 8001; is it already running?")
+        await asyncio.sleep(0.05)
+
+    try:
+        print(
+            f"{'turns':>6} {'mode':>7} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7} "
+            f"{'req/s @' + str(CONCURRENCY):>10}"
+        )
+        for turns in HISTORY_TURNS:
+            history = make_history(turns)
+            for mode in ("remote", "local"):
+                latencies, per_second = await measure(mode, history)
+                mean = sum(latencies) / len(latencies)
+                print(
+                    f"{turns:>6} {mode:>7} {mean:>8.2f} {percentile(latencies, 0.5):>7.2f} "
+                    f"{percentile(latencies, 0.95):>7.2f} {per_second:>10.0f}"
+                )
+    finally:
+        await manager.worker_clients.close()
+        server.should_exit = True
+        await serving
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
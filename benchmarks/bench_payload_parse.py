@@ -0,0 +1,108 @@
+"""
+Benchmark - JSON-in-TextPart vs DataPart question payloads
+
+Measures the cost of carrying a question with history from the terminal
+client through the manager to a worker, for 10, 100 and 1000 history turns:
+
+- "app" is the payload handling the agents do themselves (json.loads /
+  json.dumps of the text payload vs. validating and forwarding the DataPart)
+- "hop" additionally includes encoding and decoding the A2A message as the
+  JSON-RPC transport does, for client -> manager -> worker
+
+Usage:
+    uv run python benchmarks/bench_payload_parse.py
+"""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from a2a.types import Message, Part, Role, TextPart  # noqa: E402
+
+from protocol import parse_legacy_text, parse_question, question_part  # noqa: E402
+
+TURN_COUNTS = [10, 100, 1000]
+
+SAMPLE_ANSWER = (
+    'Here is a "quick" example:\n\n```python\ndef handler(request):\n'
+    '    return {"status": "ok"}\n```\n\nKeep endpoints small and well named. '
+) * 3
+
+
+def make_history(turns: int) -> list[dict]:
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"Question number {i}: how would I do that?"})
+        history.append({"role": "assistant", "content": SAMPLE_ANSWER})
+    return history
+
+
+def message(part: Part) -> Message:
+    return Message(message_id=uuid4().hex, role=Role.user, parts=[part])
+
+
+def legacy_text(question: str, history: list[dict]) -> str:
+    return json.dumps({"current_question": question, "conversation_history": history})
+
+
+def text_of(msg: Message) -> str:
+    return msg.parts[0].root.text
+
+
+def legacy_app(question: str, history: list[dict]) -> None:
+    # Client encodes, manager decodes and re-encodes, worker decodes
+    client_text = legacy_text(question, history)
+    manager = parse_legacy_text(client_text)
+    worker_text = legacy_text(manager.question, manager.history)
+    parse_legacy_text(worker_text)
+
+
+def datapart_app(question: str, history: list[dict]) -> None:
+    client_msg = message(question_part(question, history))
+    manager = parse_question(client_msg)
+    worker_msg = message(question_part(manager.question, manager.history))
+    parse_question(worker_msg)
+
+
+def legacy_hop(question: str, history: list[dict]) -> None:
+    body = message(Part(root=TextPart(text=legacy_text(question, history)))).model_dump_json()
+    manager = parse_legacy_text(text_of(Message.model_validate_json(body)))
+    text = legacy_text(manager.question, manager.history)
+    body = message(Part(root=TextPart(text=text))).model_dump_json()
+    parse_legacy_text(text_of(Message.model_validate_json(body)))
+
+
+def datapart_hop(question: str, history: list[dict]) -> None:
+    body = message(question_part(question, history)).model_dump_json()
+    manager = parse_question(Message.model_validate_json(body))
+    body = message(question_part(manager.question, manager.history)).model_dump_json()
+    parse_question(Message.model_validate_json(body))
+
+
+def best_of(func, *args, repeat: int = 5) -> float:
+    """Best per-call time in milliseconds."""
+    number = max(1, 2000 // max(1, len(args[1])))
+    return min(timeit.repeat(lambda: func(*args), number=number, repeat=repeat)) / number * 1000
+
+
+def main():
+    question = "And how do I version that API?"
+    print(f"{'turns':>6} {'stage':>5} {'text+json ms':>13} {'datapart ms':>12} {'saved':>7}")
+    for turns in TURN_COUNTS:
+        history = make_history(turns)
+        for stage, legacy, datapart in (
+            ("app", legacy_app, datapart_app),
+            ("hop", legacy_hop, datapart_hop),
+        ):
+            legacy_ms = best_of(legacy, question, history)
+            datapart_ms = best_of(datapart, question, history)
+            saved = 1 - datapart_ms / legacy_ms
+            print(f"{turns:>6} {stage:>5} {legacy_ms:>13.3f} {datapart_ms:>12.3f} {saved:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
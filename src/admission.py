@@ -0,0 +1,159 @@
+"""
+Admission Control - bounded concurrency with a bounded wait queue per agent
+
+Each executor runs at most `max_concurrent` requests at once. Further
+requests wait in a FIFO queue of at most `max_queue` entries for up to
+`queue_timeout` seconds. Requests that find the queue full, or that wait too
+long, are rejected right away with a retryable JSON-RPC error. The error
+carries a `retry_after` hint estimated from the recent service time.
+
+Limits are read per agent, e.g. MANAGER_MAX_CONCURRENT, falling back to
+MAX_CONCURRENT. They apply per process.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+
+from a2a.types import JSONRPCError
+from a2a.utils.errors import ServerError
+
+# JSON-RPC server error code for "overloaded, retry later"
+OVERLOADED_ERROR_CODE = -32029
+
+DEFAULT_MAX_CONCURRENT = 32
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_QUEUE_TIMEOUT = 30.0
+
+# Bounds of the retry-after hint in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 60
+
+
+def _env(agent: str, name: str, default: float) -> float:
+    return float(os.getenv(f"{agent.upper()}_{name}", os.getenv(name, str(default))))
+
+
+class AdmissionController:
+    """Concurrency limit plus bounded FIFO wait queue for one agent."""
+
+    def __init__(
+        self,
+        agent: str,
+        max_concurrent: int | None = None,
+        max_queue: int | None = None,
+        queue_timeout: float | None = None,
+    ):
+        self.agent = agent
+        self.max_concurrent = max_concurrent or int(
+            _env(agent, "MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT)
+        )
+        self.max_queue = max_queue if max_queue is not None else int(
+            _env(agent, "MAX_QUEUE", DEFAULT_MAX_QUEUE)
+        )
+        self.queue_timeout = queue_timeout or _env(agent, "QUEUE_TIMEOUT", DEFAULT_QUEUE_TIMEOUT)
+
+        self.active = 0
+        self.stats: Counter[str] = Counter()  # admitted, rejected_queue_full, rejected_timeout
+        self.wait_seconds_total = 0.0
+        self.recent_waits: deque[float] = deque(maxlen=1000)
+        self._service_seconds = 1.0  # Moving average of how long a request runs
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold one of the agent's slots for the duration of the block.
+
+        Raises a retryable ServerError if the request can't be admitted.
+        """
+        queued_at = time.monotonic()
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+        else:
+            await self._wait_for_slot()
+
+        waited = time.monotonic() - queued_at
+        self.stats["admitted"] += 1
+        self.wait_seconds_total += waited
+        self.recent_waits.append(waited)
+
+        started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_seconds += 0.1 * (time.monotonic() - started_at - self._service_seconds)
+            self._release()
+
+    async def _wait_for_slot(self) -> None:
+        if len(self._waiters) >= self.max_queue:
+            self.stats["rejected_queue_full"] += 1
+            raise self._overloaded("queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self._release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.stats["rejected_timeout"] += 1
+            raise self._overloaded(f"no slot within {self.queue_timeout:.0f}s") from None
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next waiter, so nobody can jump the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from queue depth and service time."""
+        estimate = self._service_seconds * (len(self._waiters) + 1) / self.max_concurrent
+        return max(MIN_RETRY_AFTER, min(MAX_RETRY_AFTER, math.ceil(estimate)))
+
+    def _overloaded(self, reason: str) -> ServerError:
+        retry_after = self.retry_after()
+        print(f"[Admission - {self.agent}] Rejected request: {reason}, retry after {retry_after}s")
+        return ServerError(
+            error=JSONRPCError(
+                code=OVERLOADED_ERROR_CODE,
+                message=f"{self.agent} is overloaded ({reason}), retry after {retry_after}s",
+                data={"retryable": True, "retry_after": retry_after},
+            )
+        )
+
+    def metrics(self) -> dict[str, float]:
+        waits = sorted(self.recent_waits)
+        return {
+            "admission_active": self.active,
+            "admission_max_concurrent": self.max_concurrent,
+            "admission_queue_depth": len(self._waiters),
+            "admission_max_queue": self.max_queue,
+            "admission_admitted_total": self.stats["admitted"],
+            "admission_rejected_queue_full_total": self.stats["rejected_queue_full"],
+            "admission_rejected_timeout_total": self.stats["rejected_timeout"],
+            "admission_wait_seconds_total": round(self.wait_seconds_total, 6),
+            "admission_wait_seconds_p50": waits[len(waits) // 2] if waits else 0.0,
+            "admission_wait_seconds_p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+        }
+
+
+def overload_retry_after(error: JSONRPCError) -> int | None:
+    """The retry-after hint of an overload error, or None for other errors."""
+    if error.code == OVERLOADED_ERROR_CODE and isinstance(error.data, dict):
+        return error.data.get("retry_after")
+    return None
@@ -1,35 +1,57 @@
 import asyncio
-import json
+import hashlib
+import importlib
 import os
+import re
+from collections import Counter
+from collections.abc import Callable
+from contextlib import asynccontextmanager
 from typing import Literal, TypedDict
 from uuid import uuid4
 
-import httpx
-import uvicorn
-from a2a.client import ClientFactory
-from a2a.client.client import ClientConfig
+from a2a.client.errors import A2AClientJSONRPCError
 from a2a.server.agent_execution import AgentExecutor, RequestContext
-from a2a.server.apps import A2AStarletteApplication
 from a2a.server.events import EventQueue
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
-    Artifact,
     Message,
     Role,
     TaskArtifactUpdateEvent,
+    TaskIdParams,
     TaskState,
     TaskStatus,
     TaskStatusUpdateEvent,
-    TextPart,
 )
+from a2a.utils.errors import ServerError
 from dotenv import load_dotenv
 from langgraph.graph import END, StateGraph
+from langgraph.types import StreamWriter
 from openai import AsyncOpenAI
 
+from admission import AdmissionController, overload_retry_after
+from artifact_stream import ArtifactStreamer, artifact_text
+from card_cache import CachedCardStarletteApplication
+from client_pool import A2AClientPool
+from conversation_store import build_conversation_store
+from metrics import metrics_routes
+from model_config import node_config
+from protocol import (
+    failure_status,
+    parse_question,
+    question_part,
+    raise_for_failed_task,
+)
+from rate_limiter import rate_limiter
+from resilient_llm import LLMCaller, llm_stats
+from response_cache import RESPONSE_CACHE, ResponseCache, admin_routes
+from router_classifier import LocalRouter, seed_examples_from_prompt
+from serving import parse_workers, serve
+from task_stores import build_task_store
+from ttl_cache import LRUTTLCache
+
 load_dotenv()
 
 # --- 1. LLM Client Setup ---
@@ -37,7 +59,11 @@ client = AsyncOpenAI(
     api_key=os.getenv("OPENAI_API_KEY"),
     base_url=os.getenv("OPENAI_BASE_URL"),
 )
-MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4")
+# Retries, hedging and the rate limiter around every call to the client
+llm = LLMCaller(client)
+# The router only emits one word, so it can use a small, fast model: ROUTER_MODEL,
+# ROUTER_TEMPERATURE, ROUTER_MAX_TOKENS (model defaults to MODEL_NAME)
+ROUTER_LLM = node_config("router", temperature=0, max_tokens=10)
 
 ROUTER_SYSTEM_PROMPT = """You are a routing assistant. Your job is to analyze questions and determine which expert should answer them.
 
@@ -55,163 +81,435 @@ Examples:
 - "How is AI changing coding interviews?" -> TECH (because it's primarily about coding/tech)
 - "How do I improve team communication?" -> HR"""
 
+# Local fast-path router; the LLM router is only asked below this confidence
+ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.85"))
+local_router = LocalRouter(seed_examples_from_prompt(ROUTER_SYSTEM_PROMPT))
+
+# Cache of LLM routing decisions keyed by normalized question
+ROUTE_CACHE_SIZE = int(os.getenv("ROUTE_CACHE_SIZE", "10000"))
+ROUTE_CACHE_TTL = float(os.getenv("ROUTE_CACHE_TTL", "3600"))
+route_cache = LRUTTLCache(max_entries=ROUTE_CACHE_SIZE, ttl=ROUTE_CACHE_TTL)
+_route_cache_fingerprint: str | None = None
+
+# How many routing decisions each path made ("local" and "cache" saved an LLM call)
+routing_stats: Counter[str] = Counter()
+
 # Worker agent URLs
 AGENT_B_URL = "http://localhost:8000"  # HR Expert
 AGENT_C_URL = "http://localhost:8001"  # Tech Expert
 
-# HTTP client with longer timeout for LLM responses
-HTTP_TIMEOUT = httpx.Timeout(timeout=120.0)  # 2 minutes
+# Experts whose worker graph runs inside this process instead of over A2A,
+# e.g. "HR,TECH" to colocate both; the others are called at their URL
+LOCAL_EXPERTS = {
+    name.strip().upper() for name in os.getenv("LOCAL_EXPERTS", "").split(",") if name.strip()
+}
+EXPERT_WORKER_MODULES = {"HR": (AGENT_B_URL, "agent_b_worker"), "TECH": (AGENT_C_URL, "agent_c_worker")}
+local_workers = {
+    url: importlib.import_module(module)
+    for expert, (url, module) in EXPERT_WORKER_MODULES.items()
+    if expert in LOCAL_EXPERTS
+}
+
+# Long-lived pooled A2A clients, one per remote worker, shared by all requests
+worker_clients = A2AClientPool(
+    [url for url in (AGENT_B_URL, AGENT_C_URL) if url not in local_workers]
+)
+
+# Conversation histories per A2A context_id, so clients only send the new question
+conversations = build_conversation_store()
+
+# Finished responses per (question, history); a hit skips the whole graph (opt-in)
+response_cache = ResponseCache()
+
+# Number of delegations currently running against each worker
+inflight_delegations: Counter[str] = Counter()
+
+# Opt-in speculative dispatch: call both experts while the LLM router decides.
+# Speculation is skipped once a worker has this many delegations in flight.
+SPECULATIVE_DISPATCH = os.getenv("SPECULATIVE_DISPATCH", "false").lower() in ("1", "true", "yes")
+SPECULATION_MAX_INFLIGHT = int(os.getenv("SPECULATION_MAX_INFLIGHT", "4"))
+speculation_stats: Counter[str] = Counter()
+
+# Worker task cancellations running in the background (referenced until done)
+worker_cancellations: set[asyncio.Task] = set()
+
+# Concurrency limit with a bounded wait queue; overflow is rejected as retryable
+admission = AdmissionController("manager")
 
 
 # --- 2. The Manager's State ---
 class ManagerState(TypedDict):
     question: str
+    context_id: str  # A2A context of the conversation, passed on to the workers
     conversation_history: list[dict]  # Previous conversation turns
     routed_to: Literal["TECH", "HR"] | None
+    route_source: Literal["local", "cache", "llm"] | None
     worker_response: str
     final_output: str
 
 
-def parse_input_message(raw_input: str) -> tuple[str, list[dict]]:
-    """Parse incoming message which may contain JSON with history, or plain text."""
-    try:
-        data = json.loads(raw_input)
-        if isinstance(data, dict) and "current_question" in data:
-            return data["current_question"], data.get("conversation_history", [])
-    except (json.JSONDecodeError, TypeError):
-        pass
-    # Fallback: treat as plain question with no history
-    return raw_input, []
-
-
-def format_question_with_history(question: str, history: list[dict]) -> str:
-    """Format a question with conversation history for the worker agents."""
-    payload = {
-        "current_question": question,
-        "conversation_history": history,
-    }
-    return json.dumps(payload)
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
 
 
-# --- 3. The Nodes ---
-async def route_question(state: ManagerState):
-    """Use LLM to determine which expert should handle the question."""
-    question = state["question"]
+def router_fingerprint() -> str:
+    """Identify the router configuration that produced a cached decision."""
+    return hashlib.sha256(f"{ROUTER_LLM.params()}\0{ROUTER_SYSTEM_PROMPT}".encode()).hexdigest()
 
-    print(f"[Agent A - Router] Analyzing question: {question}")
 
-    response = await client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=[
-            {"role": "system", "content": ROUTER_SYSTEM_PROMPT},
-            {"role": "user", "content": question},
-        ],
-        temperature=0,
-        max_tokens=10,
-    )
+def route_cache_key(question: str) -> str:
+    """Cache key for a routing decision; flushes the cache if the router changed."""
+    global _route_cache_fingerprint
+    fingerprint = router_fingerprint()
+    if fingerprint != _route_cache_fingerprint:
+        if _route_cache_fingerprint is not None:
+            print("[Agent A - Router] Router prompt or model changed, clearing route cache")
+        route_cache.clear()
+        _route_cache_fingerprint = fingerprint
+    return hashlib.sha256(normalize_question(question).encode()).hexdigest()
+
+
+# --- 3. The Nodes ---
+async def route_with_llm(question: str) -> Literal["TECH", "HR"]:
+    """Ask the LLM router which expert should handle the question."""
+    messages = [
+        {"role": "system", "content": ROUTER_SYSTEM_PROMPT},
+        {"role": "user", "content": question},
+    ]
+    # Retried on rate limits and server errors, waiting its turn when the model's budget is used up
+    response = await llm.complete(messages=messages, **ROUTER_LLM.params())
 
     decision = response.choices[0].message.content.strip().upper()
 
     # Normalize the decision
     if "TECH" in decision:
-        routed_to = "TECH"
+        return "TECH"
     elif "HR" in decision:
-        routed_to = "HR"
+        return "HR"
     else:
         # Default to TECH if unclear
-        routed_to = "TECH"
+        return "TECH"
+
+
+def route_without_llm(question: str) -> tuple[str | None, str | None, float]:
+    """Try the local classifier, then the decision cache. Returns no expert on a miss."""
+    label, confidence = local_router.classify(question)
+    if confidence >= ROUTER_CONFIDENCE_THRESHOLD:
+        return label, "local", confidence
+
+    routed_to = route_cache.get(route_cache_key(question))
+    if routed_to is not None:
+        return routed_to, "cache", confidence
+    return None, None, confidence
+
+
+def record_route(question: str, routed_to: str, route_source: str, confidence: float):
+    """Remember an LLM decision and log which path made the routing decision."""
+    if route_source == "llm":
+        route_cache.set(route_cache_key(question), routed_to)
+        # Learn from the LLM so similar questions take the fast path next time
+        local_router.learn(question, routed_to)
+
+    routing_stats[route_source] += 1
+    saved = routing_stats.total() - routing_stats["llm"]
+    print(
+        f"[Agent A - Router] Routing to: {routed_to} "
+        f"(via {route_source}, local confidence {confidence:.2f}; "
+        f"LLM calls saved so far: {saved}/{routing_stats.total()}; "
+        f"route cache hits/misses: {route_cache.stats.hits}/{route_cache.stats.misses})"
+    )
 
-    print(f"[Agent A - Router] Routing to: {routed_to}")
-    return {"routed_to": routed_to}
 
+def routing_metrics() -> dict[str, float]:
+    """Routing decisions per path, the route cache and speculative dispatch, for /metrics."""
+    samples = {
+        f'router_decisions_total{{source="{source}"}}': routing_stats[source]
+        for source in ("local", "cache", "llm")
+    }
+    decisions = routing_stats.total()
+    samples["router_llm_calls_saved_ratio"] = (
+        round((decisions - routing_stats["llm"]) / decisions, 4) if decisions else 0.0
+    )
+    samples["route_cache_hits_total"] = route_cache.stats.hits
+    samples["route_cache_misses_total"] = route_cache.stats.misses
+    samples["route_cache_evictions_total"] = route_cache.stats.evictions
+    samples["route_cache_entries"] = len(route_cache)
+    for outcome in ("dispatched", "skipped_busy"):
+        samples[f'speculation_total{{outcome="{outcome}"}}'] = speculation_stats[outcome]
+    return samples
 
-async def call_tech_expert(state: ManagerState):
-    """Call Agent C (Tech Expert) via A2A protocol."""
-    print("[Agent A] Delegating to Agent C (Tech Expert)...")
 
-    httpx_client = httpx.AsyncClient(timeout=HTTP_TIMEOUT)
-    config = ClientConfig(httpx_client=httpx_client)
-    a2a_client = await ClientFactory.connect(AGENT_C_URL, client_config=config)
+async def route_question(state: ManagerState):
+    """Route locally when confident, then try the decision cache, then the LLM."""
+    question = state["question"]
 
-    # Pass question with conversation history to the worker
-    message_text = format_question_with_history(
-        state["question"], state.get("conversation_history", [])
-    )
+    print(f"[Agent A - Router] Analyzing question: {question}")
 
-    message = Message(
-        message_id=uuid4().hex,
-        role=Role.user,
-        parts=[TextPart(type="text", text=message_text)],
+    routed_to, route_source, confidence = route_without_llm(question)
+    if routed_to is None:
+        routed_to, route_source = await route_with_llm(question), "llm"
+
+    record_route(question, routed_to, route_source, confidence)
+    return {"routed_to": routed_to, "route_source": route_source}
+
+
+def speculation_allowed() -> bool:
+    """Only speculate while every worker has spare capacity."""
+    return all(
+        inflight_delegations[url] < SPECULATION_MAX_INFLIGHT
+        for url in (AGENT_B_URL, AGENT_C_URL)
     )
 
-    worker_text = "No result from Tech Expert."
-    async for event in a2a_client.send_message(message):
-        if isinstance(event, tuple):
-            task, update = event
-            if task.artifacts:
-                artifact = task.artifacts[0]
-                if artifact.parts:
-                    part = artifact.parts[0].root
-                    if hasattr(part, "text"):
-                        worker_text = part.text
-
-    await a2a_client.close()
-    return {"worker_response": worker_text}
 
+async def speculative_route_question(state: ManagerState, writer: StreamWriter):
+    """Route while both experts already work on the question; keep the chosen one.
 
-async def call_hr_expert(state: ManagerState):
-    """Call Agent B (HR Expert) via A2A protocol."""
-    print("[Agent A] Delegating to Agent B (HR Expert)...")
+    Speculation only happens when the LLM router is needed and the workers
+    are idle enough. Otherwise this behaves exactly like route_question.
+    Tokens of both candidates are buffered until the router decides; then the
+    chosen expert's buffer is flushed and its stream is relayed live.
+    """
+    question = state["question"]
 
-    httpx_client = httpx.AsyncClient(timeout=HTTP_TIMEOUT)
-    config = ClientConfig(httpx_client=httpx_client)
-    a2a_client = await ClientFactory.connect(AGENT_B_URL, client_config=config)
+    print(f"[Agent A - Router] Analyzing question: {question}")
 
-    # Pass question with conversation history to the worker
-    message_text = format_question_with_history(
-        state["question"], state.get("conversation_history", [])
-    )
+    routed_to, route_source, confidence = route_without_llm(question)
+    if routed_to is not None or not speculation_allowed():
+        if routed_to is None:
+            speculation_stats["skipped_busy"] += 1
+            routed_to, route_source = await route_with_llm(question), "llm"
+        record_route(question, routed_to, route_source, confidence)
+        return {"routed_to": routed_to, "route_source": route_source}
+
+    print("[Agent A - Router] Speculatively dispatching to both experts...")
+    speculation_stats["dispatched"] += 1
+    buffers: dict[str, list[str]] = {"TECH": [], "HR": []}
+    chosen = None
+
+    def relay(expert: str):
+        def on_delta(text: str) -> None:
+            if chosen == expert:
+                writer(text)
+            elif chosen is None:
+                buffers[expert].append(text)
+
+        return on_delta
+
+    candidates = {
+        "TECH": asyncio.create_task(
+            delegate_to_expert(AGENT_C_URL, "Tech Expert", state, relay("TECH"))
+        ),
+        "HR": asyncio.create_task(
+            delegate_to_expert(AGENT_B_URL, "HR Expert", state, relay("HR"))
+        ),
+    }
+    for task in candidates.values():
+        # Retrieve errors of discarded candidates so they are not reported as unhandled
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    try:
+        routed_to = await route_with_llm(question)
+    except BaseException:
+        for task in candidates.values():
+            task.cancel()
+        raise
+
+    for expert, task in candidates.items():
+        if expert != routed_to:
+            task.cancel()
+    record_route(question, routed_to, "llm", confidence)
+
+    writer(format_response_header(routed_to))
+    for text in buffers[routed_to]:
+        writer(text)
+    chosen = routed_to
+
+    worker_text = await candidates[routed_to]
+    return {"routed_to": routed_to, "route_source": "llm", "worker_response": worker_text}
+
+
+async def delegate_to_expert(
+    url: str,
+    expert_name: str,
+    state: ManagerState,
+    on_delta: Callable[[str], None] | None = None,
+) -> str:
+    """Send the question to a worker agent and return its answer.
+
+    Colocated workers (LOCAL_EXPERTS) are run in-process, the others via A2A.
+    Streamed answer chunks are passed to `on_delta` as they arrive.
+    """
+    inflight_delegations[url] += 1
+    try:
+        if url in local_workers:
+            return await _run_local_expert(local_workers[url], expert_name, state, on_delta)
+        return await _send_to_expert(url, expert_name, state, on_delta)
+    except A2AClientJSONRPCError as e:
+        retry_after = overload_retry_after(e.error)
+        if retry_after is None:
+            raise
+        # Pass the worker's overload on to the client, retry hint included
+        print(f"[Agent A - Manager] {expert_name} is overloaded, retry after {retry_after}s")
+        raise ServerError(error=e.error) from e
+    finally:
+        inflight_delegations[url] -= 1
+
+
+async def _run_local_expert(
+    worker,
+    expert_name: str,
+    state: ManagerState,
+    on_delta: Callable[[str], None] | None,
+) -> str:
+    """Run a colocated worker's graph directly: no JSON, HTTP or A2A event queues.
+
+    The worker's admission control still applies, so overload surfaces the
+    same way as from a remote worker.
+    """
+    result = {}
+    async with worker.admission.admit():
+        async for mode, chunk in worker.worker_graph.astream(
+            {
+                "input_text": state["question"],
+                "context_id": state.get("context_id"),
+                "conversation_history": state.get("conversation_history", []),
+            },
+            stream_mode=["custom", "values"],
+        ):
+            if mode == "custom":
+                if on_delta:
+                    on_delta(chunk)
+            else:
+                result = chunk
+    return result.get("output_text") or f"No result from {expert_name}."
+
+
+async def cancel_worker_task(a2a_client, task_id: str, expert_name: str) -> None:
+    try:
+        await a2a_client.cancel_task(TaskIdParams(id=task_id))
+        print(f"[Agent A] Cancelled {expert_name} task {task_id}")
+    except Exception as e:
+        # Usually the task finished in the meantime
+        print(f"[Agent A] Could not cancel {expert_name} task {task_id}: {e}")
+
+
+async def _send_to_expert(
+    url: str,
+    expert_name: str,
+    state: ManagerState,
+    on_delta: Callable[[str], None] | None,
+) -> str:
+    a2a_client = await worker_clients.get(url)
+
+    # Pass question with conversation history and the routing decision (unless
+    # speculating) to the worker; the history is forwarded as already validated
+    routing = None
+    if state.get("routed_to"):
+        routing = {"expert": state["routed_to"], "source": state["route_source"]}
 
     message = Message(
         message_id=uuid4().hex,
+        context_id=state.get("context_id"),
         role=Role.user,
-        parts=[TextPart(type="text", text=message_text)],
+        parts=[
+            question_part(
+                state["question"], state.get("conversation_history", []), routing
+            )
+        ],
     )
 
-    worker_text = "No result from HR Expert."
-    async for event in a2a_client.send_message(message):
-        if isinstance(event, tuple):
-            task, update = event
-            if task.artifacts:
-                artifact = task.artifacts[0]
-                if artifact.parts:
-                    part = artifact.parts[0].root
-                    if hasattr(part, "text"):
-                        worker_text = part.text
-
-    await a2a_client.close()
+    streamed: list[str] = []
+    worker_text = None
+    worker_task_id = None
+    try:
+        async for event in a2a_client.send_message(message):
+            if isinstance(event, tuple):
+                task, update = event
+                worker_task_id = task.id
+                raise_for_failed_task(task)
+                if isinstance(update, TaskArtifactUpdateEvent):
+                    # Streaming worker: relay each chunk as it arrives
+                    if not update.append:
+                        streamed.clear()
+                    chunk = artifact_text(update.artifact)
+                    if chunk:
+                        streamed.append(chunk)
+                        if on_delta:
+                            on_delta(chunk)
+                elif task.artifacts:
+                    # Non-streaming worker: the whole answer arrives at once
+                    worker_text = artifact_text(task.artifacts[0])
+    except asyncio.CancelledError:
+        # Closing the stream doesn't stop the worker; cancel its task as well
+        if worker_task_id is not None:
+            cancellation = asyncio.create_task(
+                cancel_worker_task(a2a_client, worker_task_id, expert_name)
+            )
+            worker_cancellations.add(cancellation)
+            cancellation.add_done_callback(worker_cancellations.discard)
+        raise
+
+    if streamed:
+        return "".join(streamed)
+    if worker_text:
+        if on_delta:
+            on_delta(worker_text)
+        return worker_text
+    return f"No result from {expert_name}."
+
+
+async def call_tech_expert(state: ManagerState, writer: StreamWriter):
+    """Call Agent C (Tech Expert) via A2A protocol or in-process."""
+    print("[Agent A] Delegating to Agent C (Tech Expert)...")
+    writer(format_response_header("TECH"))
+    worker_text = await delegate_to_expert(AGENT_C_URL, "Tech Expert", state, writer)
     return {"worker_response": worker_text}
 
 
-def finalize_response(state: ManagerState):
-    """Format the final response."""
-    expert = "Tech Expert" if state["routed_to"] == "TECH" else "HR Expert"
-    report = f"""
+async def call_hr_expert(state: ManagerState, writer: StreamWriter):
+    """Call Agent B (HR Expert) via A2A protocol or in-process."""
+    print("[Agent A] Delegating to Agent B (HR Expert)...")
+    writer(format_response_header("HR"))
+    worker_text = await delegate_to_expert(AGENT_B_URL, "HR Expert", state, writer)
+    return {"worker_response": worker_text}
+
+
+RESPONSE_FOOTER = """
+
+───────────────────────────────────────────────────────────────
+"""
+
+
+def format_response_header(routed_to: str) -> str:
+    """The box in front of the expert's answer; streamed before the answer itself."""
+    expert = "Tech Expert" if routed_to == "TECH" else "HR Expert"
+    return f"""
 ╔══════════════════════════════════════════════════════════════╗
 ║  AGENT A - MANAGER RESPONSE                                  ║
 ╠══════════════════════════════════════════════════════════════╣
 ║  Question routed to: {expert:<40} ║
 ╚══════════════════════════════════════════════════════════════╝
 
-{state['worker_response']}
-
-───────────────────────────────────────────────────────────────
 """
+
+
+def finalize_response(state: ManagerState, writer: StreamWriter):
+    """Format the final response."""
+    writer(RESPONSE_FOOTER)
+    report = (
+        format_response_header(state["routed_to"])
+        + state["worker_response"]
+        + RESPONSE_FOOTER
+    )
     return {"final_output": report}
 
 
 def route_to_expert(state: ManagerState) -> str:
     """Conditional edge: route to the appropriate expert based on the decision."""
+    if state.get("worker_response") is not None:
+        # Speculative dispatch already has the chosen expert's answer
+        return "finalize"
     if state["routed_to"] == "TECH":
         return "call_tech_expert"
     else:
@@ -222,7 +520,9 @@ def route_to_expert(state: ManagerState) -> str:
 manager_builder = StateGraph(ManagerState)
 
 # Add nodes
-manager_builder.add_node("route", route_question)
+manager_builder.add_node(
+    "route", speculative_route_question if SPECULATIVE_DISPATCH else route_question
+)
 manager_builder.add_node("call_tech_expert", call_tech_expert)
 manager_builder.add_node("call_hr_expert", call_hr_expert)
 manager_builder.add_node("finalize", finalize_response)
@@ -237,6 +537,7 @@ manager_builder.add_conditional_edges(
     {
         "call_tech_expert": "call_tech_expert",
         "call_hr_expert": "call_hr_expert",
+        "finalize": "finalize",
     },
 )
 
@@ -253,31 +554,80 @@ class ManagerExecutor(AgentExecutor):
     async def execute(
         self, context: RequestContext, event_queue: EventQueue
     ) -> None:
-        raw_input = context.get_user_input() or "No input provided"
+        try:
+            async with admission.admit():
+                await self._answer(context, event_queue)
+        except asyncio.CancelledError:
+            # tasks/cancel cancels this coroutine, and with it the graph and the
+            # worker call; the SDK only tells the cancel request, so end the
+            # original stream with the canceled status too
+            await self.cancel(context, event_queue)
+            raise
+        except Exception as e:
+            # End the task with the error rather than raising it: the SDK stops
+            # reading events at the final status, and a raised error would also
+            # skip its cleanup of the task's event queue
+            print(f"[Agent A - Manager] Request failed: {e}")
+            await event_queue.enqueue_event(
+                failure_status(context.task_id, context.context_id, e)
+            )
 
-        # Parse input to extract question and conversation history
-        question, conversation_history = parse_input_message(raw_input)
+    async def _answer(
+        self, context: RequestContext, event_queue: EventQueue
+    ) -> None:
+        # Validate the question payload once, at the edge
+        payload = parse_question(context.message)
+        question, conversation_history = payload.question, payload.history
+        if conversation_history is None:
+            conversation_history = await conversations.get(context.context_id)
+        else:
+            # Legacy clients send the full history every turn
+            await conversations.replace(context.context_id, conversation_history)
 
         print(f"[Agent A - Manager] Received via A2A: {question}")
         print(f"[Agent A - Manager] Conversation history: {len(conversation_history)} turns")
 
-        # Run LangGraph manager with conversation history
-        result = await manager_graph.ainvoke({
-            "question": question,
-            "conversation_history": conversation_history,
-        })
-
-        # Send artifact event with the result
-        artifact_event = TaskArtifactUpdateEvent(
-            task_id=context.task_id,
-            context_id=context.context_id,
-            artifact=Artifact(
-                artifact_id=uuid4().hex,
-                parts=[TextPart(type="text", text=result["final_output"])],
-            ),
-            last_chunk=True,
+        artifact = ArtifactStreamer(event_queue, context.task_id, context.context_id)
+        cached = (
+            await response_cache.get(question, conversation_history) if RESPONSE_CACHE else None
         )
-        await event_queue.enqueue_event(artifact_event)
+        if cached is not None:
+            # Repeated question in the same conversation: skip routing and delegation
+            print(
+                f"[Agent A - Manager] Answered from response cache "
+                f"(hits/misses {response_cache.stats.hits}/{response_cache.stats.misses})"
+            )
+            metadata = cached.metadata()
+            await artifact.close(cached.final_output, metadata=metadata)
+            worker_response = cached.worker_response
+        else:
+            # Run LangGraph manager with conversation history, relaying the
+            # expert's tokens to the client as artifact chunks
+            result = {}
+            async for mode, chunk in manager_graph.astream(
+                {
+                    "question": question,
+                    "context_id": context.context_id,
+                    "conversation_history": conversation_history,
+                },
+                stream_mode=["custom", "values"],
+            ):
+                if mode == "custom":
+                    await artifact.send(chunk)
+                else:
+                    result = chunk
+            metadata = {"cached": False, "expert": result["routed_to"]}
+            await artifact.close(result["final_output"], metadata=metadata)
+            worker_response = result["worker_response"]
+            if RESPONSE_CACHE and not worker_response.startswith("No result from "):
+                response_cache.set(
+                    question,
+                    conversation_history,
+                    result["routed_to"],
+                    result["final_output"],
+                    worker_response,
+                )
+        await conversations.append_turn(context.context_id, question, worker_response)
 
         # Send completion status event
         status_event = TaskStatusUpdateEvent(
@@ -285,6 +635,7 @@ class ManagerExecutor(AgentExecutor):
             context_id=context.context_id,
             status=TaskStatus(state=TaskState.completed),
             final=True,
+            metadata=metadata,
         )
         await event_queue.enqueue_event(status_event)
 
@@ -302,13 +653,26 @@ class ManagerExecutor(AgentExecutor):
 
 
 # --- 6. Start Agent A as A2A Server on Port 8002 ---
-def start_server():
+@asynccontextmanager
+async def lifespan(app):
+    """Open the worker connection pools at startup and close them on shutdown."""
+    await worker_clients.start()
+    try:
+        yield
+    finally:
+        await worker_clients.close()
+
+
+def create_app():
+    """Build the A2A app; importable as an app factory for uvicorn."""
+    if LOCAL_EXPERTS:
+        print(f"[Agent A - Manager] Running colocated experts in-process: {', '.join(sorted(LOCAL_EXPERTS))}")
     card = AgentCard(
         name="Manager Agent - Multi-Expert Router",
         description="Routes questions to appropriate experts (Tech or HR) and returns their responses.",
         version="1.0.0",
         url="http://localhost:8002",
-        default_input_modes=["text/plain"],
+        default_input_modes=["application/json", "text/plain"],
         default_output_modes=["text/plain"],
         skills=[
             AgentSkill(
@@ -318,25 +682,61 @@ def start_server():
                 tags=["router", "manager", "tech", "hr"],
             )
         ],
-        capabilities=AgentCapabilities(),
+        capabilities=AgentCapabilities(streaming=True),
     )
 
+    task_store = build_task_store("manager")
     handler = DefaultRequestHandler(
         agent_executor=ManagerExecutor(),
-        task_store=InMemoryTaskStore(),
+        task_store=task_store,
     )
 
-    app = A2AStarletteApplication(
+    app = CachedCardStarletteApplication(
         agent_card=card,
         http_handler=handler,
     )
 
+    # Colocated experts keep their caches in this process; their samples are
+    # labelled with the expert, so they don't clash with the manager's own
+    expert_collectors = [
+        collect
+        for worker in local_workers.values()
+        for collect in (
+            worker.answer_cache.metrics,
+            worker.semantic_cache.metrics,
+            worker.single_flight.metrics,
+        )
+    ]
+
+    # Admin API to inspect and invalidate the response cache, and the metrics
+    return app.build(
+        lifespan=lifespan,
+        routes=admin_routes(response_cache)
+        + metrics_routes(
+            "manager",
+            admission.metrics,
+            routing_metrics,
+            rate_limiter.metrics,
+            llm_stats.metrics,
+            task_store.metrics,
+            *expert_collectors,
+        ),
+    )
+
+
+def start_server(workers: int = 1):
     print("[Agent A - Manager] Starting A2A server on port 8002...")
-    uvicorn.run(app.build(), host="0.0.0.0", port=8002)
+    print(f"[Agent A - Manager] LLM {ROUTER_LLM.describe()}")
+    serve("agent_a_manager:create_app", port=8002, workers=workers, create_app=create_app)
 
 
 # --- 7. Interactive Chat (local mode) ---
 async def chat():
+    async with worker_clients:
+        await chat_loop()
+
+
+async def chat_loop():
     print("=" * 70)
     print("  AGENT A - MULTI-EXPERT ROUTER (Local Mode)")
     print("  Type your question and press Enter.")
@@ -357,14 +757,16 @@ async def chat():
             print("Goodbye!")
             break
 
-        result = await manager_graph.ainvoke({"question": question})
-        print(result["final_output"])
+        async for chunk in manager_graph.astream(
+            {"question": question}, stream_mode="custom"
+        ):
+            print(chunk, end="", flush=True)
 
 
 if __name__ == "__main__":
     import sys
 
     if len(sys.argv) > 1 and sys.argv[1] == "--server":
-        start_server()
+        start_server(parse_workers())
     else:
         asyncio.run(chat())
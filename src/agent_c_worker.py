@@ -1,29 +1,38 @@
-import json
+import asyncio
 import os
-from typing import TypedDict
-from uuid import uuid4
+from typing import Any, TypedDict
 
-import uvicorn
 from a2a.server.agent_execution import AgentExecutor, RequestContext
-from a2a.server.apps import A2AStarletteApplication
 from a2a.server.events import EventQueue
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
-    Artifact,
-    TaskArtifactUpdateEvent,
     TaskState,
     TaskStatus,
     TaskStatusUpdateEvent,
-    TextPart,
 )
 from dotenv import load_dotenv
 from langgraph.graph import END, StateGraph
+from langgraph.types import StreamWriter
 from openai import AsyncOpenAI
 
+from admission import AdmissionController
+from answer_cache import AnswerCache, answer_cache_key
+from artifact_stream import ArtifactStreamer
+from card_cache import CachedCardStarletteApplication
+from history_window import RollingSummarizer, window_history
+from metrics import metrics_routes
+from model_config import node_config
+from protocol import failure_status, parse_question
+from rate_limiter import rate_limiter
+from resilient_llm import LLMCaller, llm_stats
+from semantic_cache import SEMANTIC_CACHE, SemanticCache
+from serving import parse_workers, serve
+from single_flight import SingleFlight
+from task_stores import build_task_store
+
 load_dotenv()
 
 # --- 1. LLM Client Setup ---
@@ -31,7 +40,26 @@ client = AsyncOpenAI(
     api_key=os.getenv("OPENAI_API_KEY"),
     base_url=os.getenv("OPENAI_BASE_URL"),
 )
-MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4")
+# Retries, hedging and the rate limiter around every call to the client
+llm = LLMCaller(client)
+# Model, temperature and max_tokens of this expert (TECH_MODEL, ...; model defaults to MODEL_NAME)
+EXPERT_LLM = node_config("tech", temperature=0.7, max_tokens=1024)
+
+# Answers to identical LLM requests (only used at temperature > 0 if opted in)
+answer_cache = AnswerCache("tech")
+
+# Answers to paraphrased questions, in this expert's own namespace (opt-in)
+semantic_cache = SemanticCache()
+SEMANTIC_NAMESPACE = "tech"
+
+# Identical concurrent requests share one LLM call
+single_flight = SingleFlight("tech")
+
+# Concurrency limit with a bounded wait queue; overflow is rejected as retryable
+admission = AdmissionController("tech")
+
+# Rolling summaries of history that no longer fits the prompt, per conversation
+summarizer = RollingSummarizer(llm)
 
 SYSTEM_PROMPT = """You are a world-class expert in technology and software development.
 
@@ -58,52 +86,156 @@ You are passionate about clean code, elegant solutions, and helping developers l
 # --- 2. The Worker's Brain (LangGraph) ---
 class WorkerState(TypedDict):
     input_text: str
+    context_id: str  # A2A context of the conversation, keys the rolling summary
     conversation_history: list[dict]
+    history_tokens: int  # Tokens of the history kept in the prompt
+    dropped_tokens: int  # Tokens of old history cut to fit the prompt budget
+    summary: str | None  # Summary of the turns before the kept history
+    dropped_history: list[dict]  # Turns cut from the window, not yet summarized
+    summary_covers: int  # Leading history messages covered once those are summarized
+    cache_key: str  # Hash of the LLM request, keys the answer cache and single flight
+    context_key: str | None  # Key of everything but the question, for the semantic cache
+    question_vector: Any  # Question embedding (numpy array), None if not embedded
     output_text: str
 
 
-def parse_input_message(raw_input: str) -> tuple[str, list[dict]]:
-    """Parse incoming message which may contain JSON with history, or plain text."""
-    try:
-        data = json.loads(raw_input)
-        if isinstance(data, dict) and "current_question" in data:
-            return data["current_question"], data.get("conversation_history", [])
-    except (json.JSONDecodeError, TypeError):
-        pass
-    # Fallback: treat as plain question with no history
-    return raw_input, []
+def trim_history(state: WorkerState):
+    """Cut the history to the prompt token budget, keeping the most recent turns.
 
-
-async def answer_tech_question(state: WorkerState):
-    """Use LLM to answer tech/code questions."""
+    Turns already covered by the conversation's rolling summary are replaced
+    by that summary.
+    """
+    history = state.get("conversation_history", [])
+    summary, covered = summarizer.lookup(state.get("context_id", ""), history)
+    window = window_history(
+        history[covered:], SYSTEM_PROMPT, state["input_text"], EXPERT_LLM.model, summary=summary
+    )
+    if window.dropped_messages:
+        print(
+            f"[Agent C - Tech Expert] Dropped {window.dropped_messages} old messages "
+            f"({window.dropped_tokens} tokens) to fit the prompt budget"
+        )
+    dropped_until = covered + window.dropped_messages
+    return {
+        "conversation_history": window.history,
+        "history_tokens": window.history_tokens,
+        "dropped_tokens": window.dropped_tokens,
+        "summary": summary,
+        "dropped_history": history[covered:dropped_until],
+        "summary_covers": dropped_until,
+    }
+
+
+async def summarize_history(state: WorkerState):
+    """Fold dropped turns into the rolling summary, in the background."""
+    context_id = state.get("context_id")
+    dropped = state.get("dropped_history", [])
+    if context_id and summarizer.schedule(
+        context_id, state.get("summary"), dropped, state["summary_covers"]
+    ):
+        print(f"[Agent C - Tech Expert] Summarizing {len(dropped)} dropped messages in the background")
+    return {}
+
+
+def build_messages(state: WorkerState) -> list[dict]:
+    """The chat messages sent to the LLM for this question."""
     question = state["input_text"]
     history = state.get("conversation_history", [])
 
     # Build messages list with conversation history
     messages = [{"role": "system", "content": SYSTEM_PROMPT}]
 
+    # Add the summary of turns that no longer fit the prompt
+    if state.get("summary"):
+        messages.append({
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{state['summary']}",
+        })
+
     # Add conversation history
     for turn in history:
         messages.append({"role": turn["role"], "content": turn["content"]})
 
     # Add current question
     messages.append({"role": "user", "content": question})
+    return messages
+
+
+async def lookup_answer(state: WorkerState, writer: StreamWriter):
+    """Answer from the cache if the same or a paraphrased request was seen before."""
+    messages = build_messages(state)
+    update = {
+        "cache_key": answer_cache_key(messages=messages, **EXPERT_LLM.params()),
+        "context_key": None,
+        "question_vector": None,
+    }
+
+    if answer_cache.enabled_for(EXPERT_LLM.temperature):
+        answer = await answer_cache.get(update["cache_key"])
+        if answer is not None:
+            writer(answer)
+            return {**update, "output_text": answer}
+
+    if SEMANTIC_CACHE:
+        vector = await semantic_cache.embed(state["input_text"])
+        if vector is not None:
+            # Only reuse answers given after the same history, summary and settings
+            context_key = answer_cache_key(messages=messages[:-1], **EXPERT_LLM.params())
+            update |= {"context_key": context_key, "question_vector": vector}
+            match = semantic_cache.lookup(SEMANTIC_NAMESPACE, vector, context_key)
+            if match is not None:
+                answer, _ = match
+                if answer_cache.enabled_for(EXPERT_LLM.temperature):
+                    answer_cache.set(update["cache_key"], answer)
+                writer(answer)
+                return {**update, "output_text": answer}
+
+    return update
+
+
+def route_after_lookup(state: WorkerState) -> str:
+    """Skip the LLM call on a cache hit."""
+    return "summarize" if state.get("output_text") else "process"
+
+
+async def answer_tech_question(state: WorkerState, writer: StreamWriter):
+    """Use LLM to answer tech/code questions."""
+    messages = build_messages(state)
+
+    async def generate(on_delta) -> str:
+        # Retried on rate limits and server errors, waiting its turn when the
+        # model's budget is used up; tokens are forwarded to the executor as
+        # they arrive, and cancellation closes the HTTP stream so generation stops
+        answer = await llm.stream(
+            on_delta,
+            messages=messages,
+            **EXPERT_LLM.params(),
+        )
+        if answer_cache.enabled_for(EXPERT_LLM.temperature):
+            answer_cache.set(state["cache_key"], answer)
+        if state.get("question_vector") is not None:
+            semantic_cache.add(
+                SEMANTIC_NAMESPACE, state["question_vector"], state["context_key"], answer
+            )
+        return answer
 
-    response = await client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=messages,
-        temperature=0.7,
-        max_tokens=1024,
-    )
-
-    answer = response.choices[0].message.content
+    # Requests identical to one already in flight wait for its answer instead
+    answer, _ = await single_flight.run(state["cache_key"], generate, writer)
     return {"output_text": answer}
 
 
 worker_builder = StateGraph(WorkerState)
+worker_builder.add_node("window_history", trim_history)
+worker_builder.add_node("lookup_answer", lookup_answer)
 worker_builder.add_node("process", answer_tech_question)
-worker_builder.set_entry_point("process")
-worker_builder.add_edge("process", END)
+worker_builder.add_node("summarize", summarize_history)
+worker_builder.set_entry_point("window_history")
+worker_builder.add_edge("window_history", "lookup_answer")
+worker_builder.add_conditional_edges(
+    "lookup_answer", route_after_lookup, ["process", "summarize"]
+)
+worker_builder.add_edge("process", "summarize")
+worker_builder.add_edge("summarize", END)
 worker_graph = worker_builder.compile()
 
 
@@ -112,31 +244,59 @@ class TechWorkerExecutor(AgentExecutor):
     async def execute(
         self, context: RequestContext, event_queue: EventQueue
     ) -> None:
-        raw_input = context.get_user_input() or "No input provided"
+        try:
+            async with admission.admit():
+                await self._answer(context, event_queue)
+        except asyncio.CancelledError:
+            # tasks/cancel cancels this coroutine; the SDK only tells the cancel
+            # request, so end the original stream with the canceled status too
+            await self.cancel(context, event_queue)
+            raise
+        except Exception as e:
+            # End the task with the error rather than raising it: the SDK stops
+            # reading events at the final status, and a raised error would also
+            # skip its cleanup of the task's event queue
+            print(f"[Agent C - Tech Expert] Request failed: {e}")
+            await event_queue.enqueue_event(
+                failure_status(context.task_id, context.context_id, e)
+            )
 
-        # Parse input to extract question and conversation history
-        question, conversation_history = parse_input_message(raw_input)
+    async def _answer(
+        self, context: RequestContext, event_queue: EventQueue
+    ) -> None:
+        # Validate the question payload to extract question and conversation history
+        payload = parse_question(context.message)
+        question, conversation_history = payload.question, payload.history or []
 
         print(f"[Agent C - Tech Expert] Received: {question}")
         print(f"[Agent C - Tech Expert] Conversation history: {len(conversation_history)} turns")
 
-        # Run LangGraph with conversation history
-        response = await worker_graph.ainvoke({
-            "input_text": question,
-            "conversation_history": conversation_history,
-        })
-
-        # Send artifact event with the result
-        artifact_event = TaskArtifactUpdateEvent(
-            task_id=context.task_id,
-            context_id=context.context_id,
-            artifact=Artifact(
-                artifact_id=uuid4().hex,
-                parts=[TextPart(type="text", text=response["output_text"])],
-            ),
-            last_chunk=True,
+        # Announce the task right away, so the manager learns its id and can cancel it
+        await event_queue.enqueue_event(
+            TaskStatusUpdateEvent(
+                task_id=context.task_id,
+                context_id=context.context_id,
+                status=TaskStatus(state=TaskState.working),
+                final=False,
+            )
         )
-        await event_queue.enqueue_event(artifact_event)
+
+        # Run LangGraph with conversation history, streaming tokens as artifact chunks
+        artifact = ArtifactStreamer(event_queue, context.task_id, context.context_id)
+        response = {}
+        async for mode, chunk in worker_graph.astream(
+            {
+                "input_text": question,
+                "context_id": context.context_id,
+                "conversation_history": conversation_history,
+            },
+            stream_mode=["custom", "values"],
+        ):
+            if mode == "custom":
+                await artifact.send(chunk)
+            else:
+                response = chunk
+        await artifact.close(response["output_text"])
 
         # Send completion status event
         status_event = TaskStatusUpdateEvent(
@@ -160,13 +320,14 @@ class TechWorkerExecutor(AgentExecutor):
         await event_queue.enqueue_event(status_event)
 
 # --- 4. Start Agent C on Port 8001 ---
-def start_agent_c():
+def create_app():
+    """Build the A2A app; importable as an app factory for uvicorn."""
     card = AgentCard(
         name="Tech & Code Expert Agent",
         description="Expert in technology, programming, and software development.",
         version="1.0.0",
         url="http://localhost:8001",
-        default_input_modes=["text/plain"],
+        default_input_modes=["application/json", "text/plain"],
         default_output_modes=["text/plain"],
         skills=[
             AgentSkill(
@@ -176,22 +337,39 @@ def start_agent_c():
                 tags=["tech", "code", "programming", "software"],
             )
         ],
-        capabilities=AgentCapabilities(),
+        capabilities=AgentCapabilities(streaming=True),
     )
 
+    task_store = build_task_store("tech")
     handler = DefaultRequestHandler(
         agent_executor=TechWorkerExecutor(),
-        task_store=InMemoryTaskStore(),
+        task_store=task_store,
     )
 
-    app = A2AStarletteApplication(
+    app = CachedCardStarletteApplication(
         agent_card=card,
         http_handler=handler,
     )
 
+    return app.build(
+        routes=metrics_routes(
+            "tech",
+            admission.metrics,
+            rate_limiter.metrics,
+            llm_stats.metrics,
+            answer_cache.metrics,
+            semantic_cache.metrics,
+            single_flight.metrics,
+            task_store.metrics,
+        )
+    )
+
+
+def start_agent_c(workers: int = 1):
     print("[Agent C - Tech Expert] Starting on port 8001...")
-    uvicorn.run(app.build(), host="0.0.0.0", port=8001)
+    print(f"[Agent C - Tech Expert] LLM {EXPERT_LLM.describe()}")
+    serve("agent_c_worker:create_app", port=8001, workers=workers, create_app=create_app)
 
 
 if __name__ == "__main__":
-    start_agent_c()
+    start_agent_c(parse_workers())
@@ -0,0 +1,130 @@
+"""
+Answer Cache - reuse expert answers for identical LLM requests
+
+Keyed by a stable hash of everything the model sees: model name, sampling
+parameters and the full message list (system prompt, summary, history and
+question). FAQ-style questions and retried requests are answered without an
+LLM call. The cache is bounded by entries and bytes with LRU eviction.
+
+With temperature 0 the answer is (close to) deterministic, so caching is on by
+default. For sampled answers (temperature > 0) a cached reply hides the
+variety the temperature asks for, so it has to be enabled explicitly.
+
+With ANSWER_CACHE_DIR set, answers are also persisted to a per-expert SQLite
+file (see disk_cache.py), shared by all processes of that expert and loaded
+back into memory before the first lookup.
+"""
+
+import hashlib
+import json
+import os
+
+from disk_cache import DiskAnswerCache
+from ttl_cache import LRUTTLCache
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+ANSWER_CACHE_MAX_BYTES = int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "86400"))
+# Also cache answers generated with temperature > 0
+ANSWER_CACHE_SAMPLED = os.getenv("ANSWER_CACHE_SAMPLED", "false").lower() in ("1", "true", "yes")
+# Directory for the persistent answer cache; empty keeps answers in memory only
+ANSWER_CACHE_DIR = os.getenv("ANSWER_CACHE_DIR", "")
+
+
+def answer_cache_key(
+    model: str, temperature: float, max_tokens: int, messages: list[dict]
+) -> str:
+    """Stable hash of an LLM request; equal requests give equal keys."""
+    canonical = json.dumps(
+        {
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": [[m["role"], m["content"]] for m in messages],
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class AnswerCache:
+    """Bounded LRU cache of LLM answers keyed by `answer_cache_key`.
+
+    `name` identifies the expert; it names the on-disk cache file when
+    ANSWER_CACHE_DIR is set.
+    """
+
+    def __init__(
+        self,
+        name: str | None = None,
+        max_entries: int = ANSWER_CACHE_SIZE,
+        max_bytes: int = ANSWER_CACHE_MAX_BYTES,
+        ttl: float = ANSWER_CACHE_TTL,
+        cache_sampled: bool = ANSWER_CACHE_SAMPLED,
+        cache_dir: str = ANSWER_CACHE_DIR,
+    ):
+        self.name = name
+        self.cache_sampled = cache_sampled
+        self._answers = LRUTTLCache(
+            max_entries=max_entries,
+            ttl=ttl,
+            max_bytes=max_bytes,
+            sizeof=lambda answer: len(answer.encode()),
+        )
+        self.disk_hits = 0
+        self.disk = None
+        self._warm_load_pending = False
+        if cache_dir and name:
+            self.disk = DiskAnswerCache(os.path.join(cache_dir, f"{name}_answers.sqlite"), ttl)
+            self._warm_load_pending = True
+
+    async def warm_load(self) -> int:
+        """Load the most recent answers from disk into memory."""
+        entries = await self.disk.recent(self._answers.max_entries)
+        for key, answer, ttl in entries:
+            self._answers.set(key, answer, ttl=ttl)
+        print(f"[Answer Cache] Loaded {len(entries)} answers from {self.disk.path}")
+        return len(entries)
+
+    @property
+    def stats(self):
+        return self._answers.stats
+
+    def enabled_for(self, temperature: float) -> bool:
+        return temperature <= 0 or self.cache_sampled
+
+    async def get(self, key: str) -> str | None:
+        if self._warm_load_pending:
+            # Lookups meanwhile fall through to the disk, so they are still answered
+            self._warm_load_pending = False
+            await self.warm_load()
+        answer = self._answers.get(key)
+        if answer is None and self.disk is not None:
+            # Written by another process, or evicted from memory
+            entry = await self.disk.get(key)
+            if entry is not None:
+                answer, ttl = entry
+                self._answers.set(key, answer, ttl=ttl)
+                self.disk_hits += 1
+        return answer
+
+    def set(self, key: str, answer: str) -> None:
+        if answer:
+            self._answers.set(key, answer)
+            if self.disk is not None:
+                self.disk.put(key, answer)
+
+    def metrics(self) -> dict[str, float]:
+        stats = self._answers.stats
+        label = f'{{expert="{self.name}"}}' if self.name else ""
+        return {
+            # A disk hit is a miss in memory; count it as a hit only
+            f"answer_cache_hits_total{label}": stats.hits + self.disk_hits,
+            f"answer_cache_misses_total{label}": stats.misses - self.disk_hits,
+            f"answer_cache_disk_hits_total{label}": self.disk_hits,
+            f"answer_cache_evictions_total{label}": stats.evictions,
+            f"answer_cache_expirations_total{label}": stats.expirations,
+            f"answer_cache_entries{label}": len(self._answers),
+            f"answer_cache_bytes{label}": self._answers.total_bytes,
+        }
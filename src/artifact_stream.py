@@ -0,0 +1,57 @@
+"""
+Artifact Streaming - incremental A2A artifact updates from an executor
+
+Sends text as a sequence of TaskArtifactUpdateEvents on a single artifact:
+the first chunk creates the artifact, later chunks are sent with
+`append=True`, and `close()` marks the last chunk.
+"""
+
+from uuid import uuid4
+
+from a2a.server.events import EventQueue
+from a2a.types import Artifact, TaskArtifactUpdateEvent, TextPart
+
+
+class ArtifactStreamer:
+    """Stream text chunks into one artifact of a task."""
+
+    def __init__(self, event_queue: EventQueue, task_id: str, context_id: str):
+        self.event_queue = event_queue
+        self.task_id = task_id
+        self.context_id = context_id
+        self.artifact_id = uuid4().hex
+        self.chunks_sent = 0
+
+    async def send(
+        self, text: str, last_chunk: bool = False, metadata: dict | None = None
+    ) -> None:
+        """Append a chunk of text to the artifact."""
+        artifact_event = TaskArtifactUpdateEvent(
+            task_id=self.task_id,
+            context_id=self.context_id,
+            artifact=Artifact(
+                artifact_id=self.artifact_id,
+                parts=[TextPart(type="text", text=text)],
+                metadata=metadata,
+            ),
+            append=self.chunks_sent > 0,
+            last_chunk=last_chunk,
+        )
+        await self.event_queue.enqueue_event(artifact_event)
+        self.chunks_sent += 1
+
+    async def close(self, full_text: str, metadata: dict | None = None) -> None:
+        """Finish the artifact; sends `full_text` whole if nothing was streamed.
+
+        `metadata` is attached to the last chunk.
+        """
+        await self.send(
+            "" if self.chunks_sent else full_text, last_chunk=True, metadata=metadata
+        )
+
+
+def artifact_text(artifact: Artifact) -> str:
+    """Concatenate the text parts of an artifact."""
+    return "".join(
+        part.root.text for part in artifact.parts if hasattr(part.root, "text")
+    )
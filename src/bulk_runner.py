@@ -0,0 +1,183 @@
+"""
+Bulk Runner - push a file of questions through Agent A
+
+Reads questions as JSONL, one per line, from a file or stdin:
+
+    {"question": "How do I write a decorator?"}
+    {"id": "q2", "question": "And a class decorator?", "history": [{"role": "user", "content": "..."}, ...]}
+    "A bare JSON string works too"
+
+Up to `concurrency` questions are in flight at once. Every question is asked
+in a fresh conversation (with its `history`, if given). Results are written
+as JSONL in input order as soon as all earlier ones are done:
+
+    {"index": 0, "id": null, "question": "...", "answer": "...", "error": null,
+     "expert": "TECH", "cached": false, "latency_seconds": 1.234, "attempts": 1}
+
+Rejections by an overloaded agent are retried after the advertised
+retry-after. A summary with throughput and latency percentiles goes to
+stderr at the end.
+
+Usage:
+    python terminal_client.py --bulk questions.jsonl --output results.jsonl
+    python terminal_client.py --bulk - --concurrency 32 < questions.jsonl > results.jsonl
+"""
+
+import asyncio
+import json
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from typing import TextIO
+from uuid import uuid4
+
+from a2a.client.errors import A2AClientJSONRPCError
+
+from admission import overload_retry_after
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_RETRIES = 3
+
+# ask(question, history, context_id, on_metadata=...) -> answer; raises on errors
+AskFn = Callable[..., Awaitable[str]]
+
+
+def parse_item(line: str) -> tuple[str, list[dict] | None, object]:
+    """Question, optional history and optional id of one input line."""
+    item = json.loads(line)
+    if isinstance(item, str):
+        return item, None, None
+    if not isinstance(item, dict) or not isinstance(item.get("question"), str):
+        raise ValueError('expected a JSON string or an object with a "question" string')
+    return item["question"], item.get("history"), item.get("id")
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class BulkRunner:
+    """Ask Agent A many questions concurrently and write the answers in input order."""
+
+    def __init__(
+        self,
+        ask: AskFn,
+        output: TextIO,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        retries: int = DEFAULT_RETRIES,
+    ):
+        self.ask = ask
+        self.output = output
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.latencies: list[float] = []
+        self.errors = 0
+        self._results: dict[int, dict] = {}
+        self._next_to_write = 0
+
+    async def run(self, source: TextIO) -> dict:
+        """Process every line of `source`; returns the summary."""
+        window = asyncio.Semaphore(self.concurrency)
+        in_flight: set[asyncio.Task] = set()
+        started_at = time.perf_counter()
+
+        index = 0
+        # Read lazily, so stdin can be streamed and huge files aren't loaded at once
+        while line := await asyncio.to_thread(source.readline):
+            if not line.strip():
+                continue
+            await window.acquire()
+            task = asyncio.create_task(self._process(index, line, window))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            index += 1
+        await asyncio.gather(*in_flight)
+
+        return self.summary(index, time.perf_counter() - started_at)
+
+    async def _process(self, index: int, line: str, window: asyncio.Semaphore) -> None:
+        try:
+            self._results[index] = await self._answer(index, line)
+        finally:
+            window.release()
+        self._write_ready()
+
+    async def _answer(self, index: int, line: str) -> dict:
+        result = {"index": index, "id": None, "question": None, "answer": None, "error": None}
+        try:
+            question, history, item_id = parse_item(line)
+        except ValueError as e:  # json.JSONDecodeError is a ValueError
+            self.errors += 1
+            return {**result, "error": f"Invalid input line: {e}"}
+        result.update(id=item_id, question=question)
+
+        metadata: dict = {}
+        started_at = time.perf_counter()
+        for attempt in range(1, self.retries + 2):
+            try:
+                answer = await self.ask(
+                    question, history, uuid4().hex, on_metadata=metadata.update
+                )
+            except A2AClientJSONRPCError as e:
+                retry_after = overload_retry_after(e.error)
+                if retry_after is None or attempt > self.retries:
+                    error = str(e)
+                    break
+                await asyncio.sleep(retry_after)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                break
+            else:
+                latency = time.perf_counter() - started_at
+                self.latencies.append(latency)
+                return {
+                    **result,
+                    "answer": answer,
+                    "expert": metadata.get("expert"),
+                    "cached": metadata.get("cached", False),
+                    "latency_seconds": round(latency, 3),
+                    "attempts": attempt,
+                }
+
+        self.errors += 1
+        return {**result, "error": error, "attempts": attempt}
+
+    def _write_ready(self) -> None:
+        """Write the finished results that are next in input order."""
+        while self._next_to_write in self._results:
+            record = self._results.pop(self._next_to_write)
+            self.output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._next_to_write += 1
+        self.output.flush()
+
+    def summary(self, total: int, elapsed: float) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "questions": total,
+            "answered": len(latencies),
+            "errors": self.errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "questions_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "latency_p50": round(percentile(latencies, 0.50), 3),
+            "latency_p90": round(percentile(latencies, 0.90), 3),
+            "latency_p99": round(percentile(latencies, 0.99), 3),
+            "latency_max": round(latencies[-1], 3) if latencies else 0.0,
+        }
+
+
+def print_summary(summary: dict) -> None:
+    print(
+        f"[Bulk] {summary['answered']}/{summary['questions']} answered, "
+        f"{summary['errors']} errors in {summary['elapsed_seconds']}s "
+        f"({summary['questions_per_second']} questions/s)",
+        file=sys.stderr,
+    )
+    print(
+        f"[Bulk] Latency p50 {summary['latency_p50']}s, p90 {summary['latency_p90']}s, "
+        f"p99 {summary['latency_p99']}s, max {summary['latency_max']}s",
+        file=sys.stderr,
+    )
+
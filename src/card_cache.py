@@ -0,0 +1,187 @@
+"""
+Agent Card Cache - cheap agent card resolution on both sides of A2A
+
+Client side, AgentCardCache keeps resolved cards per agent URL with a TTL,
+refreshes them in the background before they expire and revalidates them with
+ETag / Last-Modified so an unchanged card costs a 304 instead of a re-parse.
+
+Server side, CachedCardStarletteApplication serves the card from bytes that
+are serialized once at startup, with the validators the cache relies on.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+
+import httpx
+from a2a.server.apps import A2AStarletteApplication
+from a2a.types import AgentCard
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Seconds a resolved card is served without asking the agent again
+AGENT_CARD_TTL = float(os.getenv("AGENT_CARD_TTL", "300"))
+
+# Fraction of the TTL after which a background revalidation is started
+REFRESH_AFTER = 0.8
+
+
+@dataclass
+class CardEntry:
+    card: AgentCard
+    fetched_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class AgentCardCache:
+    """Per-URL agent card cache with TTL, background refresh and revalidation."""
+
+    def __init__(self, ttl: float = AGENT_CARD_TTL, timeout: float = 10.0):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._entries: dict[str, CardEntry] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._own_client: httpx.AsyncClient | None = None
+
+    async def get(
+        self, url: str, httpx_client: httpx.AsyncClient | None = None
+    ) -> AgentCard:
+        """Return the card for an agent, fetching or revalidating it if needed."""
+        entry = self._entries.get(url)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl:
+                if age >= self.ttl * REFRESH_AFTER:
+                    self._schedule_refresh(url, httpx_client)
+                return entry.card
+
+        lock = self._locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(url)
+            if entry is not None and time.monotonic() - entry.fetched_at < self.ttl:
+                return entry.card
+            try:
+                entry = await self._fetch(url, httpx_client)
+            except Exception as e:
+                if entry is None:
+                    raise
+                # Serve the stale card rather than failing the request
+                print(f"[Card Cache] Revalidation of {url} failed, serving stale card: {e}")
+            return entry.card
+
+    def invalidate(self, url: str | None = None) -> None:
+        """Forget the card for one agent, or for all agents."""
+        if url is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(url, None)
+
+    async def close(self) -> None:
+        """Stop background refreshes and close the cache's own HTTP client."""
+        for task in self._refreshing.values():
+            task.cancel()
+        self._refreshing.clear()
+        if self._own_client is not None:
+            await self._own_client.aclose()
+            self._own_client = None
+
+    def _schedule_refresh(
+        self, url: str, httpx_client: httpx.AsyncClient | None
+    ) -> None:
+        task = self._refreshing.get(url)
+        if task is not None and not task.done():
+            return
+        self._refreshing[url] = asyncio.create_task(self._refresh(url, httpx_client))
+
+    async def _refresh(self, url: str, httpx_client: httpx.AsyncClient | None) -> None:
+        try:
+            await self._fetch(url, httpx_client)
+        except Exception as e:
+            print(f"[Card Cache] Background refresh of {url} failed: {e}")
+
+    async def _fetch(
+        self, url: str, httpx_client: httpx.AsyncClient | None
+    ) -> CardEntry:
+        """Fetch the card, sending validators from the cached copy if we have one."""
+        if httpx_client is None:
+            if self._own_client is None:
+                self._own_client = httpx.AsyncClient(timeout=self.timeout)
+            httpx_client = self._own_client
+
+        previous = self._entries.get(url)
+        headers = {}
+        if previous is not None:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+
+        card_url = f"{url.rstrip('/')}{AGENT_CARD_WELL_KNOWN_PATH}"
+        response = await httpx_client.get(card_url, headers=headers)
+
+        if response.status_code == 304 and previous is not None:
+            # Card unchanged: keep the parsed object, just extend its lifetime
+            previous.fetched_at = time.monotonic()
+            return previous
+
+        response.raise_for_status()
+        entry = CardEntry(
+            card=AgentCard.model_validate_json(response.content),
+            fetched_at=time.monotonic(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        self._entries[url] = entry
+        return entry
+
+
+class CachedCardStarletteApplication(A2AStarletteApplication):
+    """A2A Starlette app that serves a pre-serialized agent card with validators."""
+
+    def __init__(self, agent_card: AgentCard, *args, **kwargs):
+        super().__init__(agent_card, *args, **kwargs)
+        self._card_bytes = agent_card.model_dump_json(
+            exclude_none=True, by_alias=True
+        ).encode()
+        self._card_etag = f'"{hashlib.sha256(self._card_bytes).hexdigest()[:32]}"'
+        self._card_last_modified_at = int(time.time())
+        self._card_headers = {
+            "ETag": self._card_etag,
+            "Last-Modified": formatdate(self._card_last_modified_at, usegmt=True),
+            "Cache-Control": f"max-age={int(AGENT_CARD_TTL)}",
+        }
+
+    async def _handle_get_agent_card(self, request: Request) -> Response:
+        """Serve the agent card bytes, answering conditional requests with 304."""
+        if self.card_modifier:
+            # Dynamic cards cannot be pre-serialized
+            return await super()._handle_get_agent_card(request)
+
+        if self._is_not_modified(request):
+            return Response(status_code=304, headers=self._card_headers)
+        return Response(
+            self._card_bytes,
+            media_type="application/json",
+            headers=self._card_headers,
+        )
+
+    def _is_not_modified(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or self._card_etag in tags
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return self._card_last_modified_at <= since
+        return False
@@ -0,0 +1,98 @@
+"""
+A2A Client Pool - long-lived connections to remote agents
+
+Keeps one pooled httpx client and one connected A2A client per agent URL so
+that delegations reuse TCP connections and the already-resolved agent card
+instead of paying a handshake and a card fetch on every request. Cards come
+from an AgentCardCache; the A2A client is rebuilt only when the card changes.
+"""
+
+import asyncio
+import os
+
+import httpx
+from a2a.client import Client, ClientFactory
+from a2a.client.client import ClientConfig
+from a2a.types import AgentCard
+
+from card_cache import AgentCardCache
+
+# HTTP client with longer timeout for LLM responses
+HTTP_TIMEOUT = httpx.Timeout(timeout=120.0)  # 2 minutes
+
+# Connection pool limits, shared by all requests going to the same agent
+POOL_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("A2A_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("A2A_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    keepalive_expiry=float(os.getenv("A2A_KEEPALIVE_EXPIRY", "30")),
+)
+
+
+class A2AClientPool:
+    """Registry of one pooled httpx client and one A2A client per agent URL."""
+
+    def __init__(
+        self,
+        urls: list[str],
+        timeout: httpx.Timeout = HTTP_TIMEOUT,
+        limits: httpx.Limits = POOL_LIMITS,
+        card_cache: AgentCardCache | None = None,
+    ):
+        self.urls = list(urls)
+        self.timeout = timeout
+        self.limits = limits
+        self.card_cache = card_cache or AgentCardCache()
+        self._httpx_clients: dict[str, httpx.AsyncClient] = {}
+        self._clients: dict[str, Client] = {}
+        self._cards: dict[str, AgentCard] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def start(self) -> None:
+        """Connect to every known agent. Unreachable agents are retried lazily."""
+        for url in self.urls:
+            try:
+                await self.get(url)
+            except Exception as e:
+                print(f"[A2A Pool] Could not connect to {url} yet: {e}")
+
+    async def get(self, url: str) -> Client:
+        """Return the connected A2A client for an agent, connecting on first use."""
+        httpx_client = self._httpx_client(url)
+        card = await self.card_cache.get(url, httpx_client)
+        client = self._clients.get(url)
+        if client is not None and self._cards.get(url) is card:
+            return client
+
+        lock = self._locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            client = self._clients.get(url)
+            if client is None or self._cards.get(url) is not card:
+                config = ClientConfig(httpx_client=httpx_client)
+                client = await ClientFactory.connect(card, client_config=config)
+                self._clients[url] = client
+                self._cards[url] = card
+                print(f"[A2A Pool] Connected to {url}")
+        return client
+
+    def _httpx_client(self, url: str) -> httpx.AsyncClient:
+        httpx_client = self._httpx_clients.get(url)
+        if httpx_client is None:
+            httpx_client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+            self._httpx_clients[url] = httpx_client
+        return httpx_client
+
+    async def close(self) -> None:
+        """Close all A2A clients, their connection pools and the card cache."""
+        await self.card_cache.close()
+        for httpx_client in self._httpx_clients.values():
+            await httpx_client.aclose()
+        self._clients.clear()
+        self._cards.clear()
+        self._httpx_clients.clear()
+
+    async def __aenter__(self) -> "A2AClientPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,182 @@
+"""
+Conversation Store - server-side chat history keyed by A2A context_id
+
+Lets clients send only the new question: the manager looks up the history of
+the conversation by the message's context_id and appends each finished turn.
+Conversations expire after an idle timeout, and the store as a whole is
+bounded by number of conversations and total bytes (least recently used
+conversations are evicted first).
+
+With several manager processes the history must be shared, so with
+SHARED_STATE_DIR set the conversations are kept in SQLite instead. Both
+stores have the same async interface; the SQLite one runs its queries on a
+thread of its own, so a slow disk doesn't stall the event loop.
+"""
+
+import asyncio
+import atexit
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ttl_cache import LRUTTLCache
+
+MAX_CONVERSATIONS = int(os.getenv("CONVERSATION_MAX_CONTEXTS", "10000"))
+MAX_CONVERSATION_BYTES = int(os.getenv("CONVERSATION_MAX_BYTES", str(64 * 1024 * 1024)))
+CONVERSATION_IDLE_TTL = float(os.getenv("CONVERSATION_IDLE_TTL", "3600"))
+# Oldest messages beyond this are dropped from a single conversation
+MAX_MESSAGES_PER_CONVERSATION = int(os.getenv("CONVERSATION_MAX_MESSAGES", "200"))
+
+# Directory for state shared by all processes of the manager; empty keeps it in memory
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR", "")
+# Idle conversations are deleted from the database every this many writes
+COMPACT_EVERY_WRITES = 1000
+
+# Rough per-message overhead on top of the content itself
+MESSAGE_OVERHEAD_BYTES = 64
+
+
+def history_size(history: list[dict]) -> int:
+    """Approximate memory footprint of a conversation history in bytes."""
+    return sum(len(turn["content"]) + MESSAGE_OVERHEAD_BYTES for turn in history)
+
+
+class ConversationStore:
+    """Bounded, idle-expiring map of context_id -> list of chat messages."""
+
+    def __init__(
+        self,
+        max_conversations: int = MAX_CONVERSATIONS,
+        max_bytes: int = MAX_CONVERSATION_BYTES,
+        idle_ttl: float = CONVERSATION_IDLE_TTL,
+        max_messages: int = MAX_MESSAGES_PER_CONVERSATION,
+    ):
+        self.max_messages = max_messages
+        self._histories = LRUTTLCache(
+            max_entries=max_conversations,
+            ttl=idle_ttl,
+            max_bytes=max_bytes,
+            sizeof=history_size,
+            sliding=True,
+        )
+
+    def __len__(self) -> int:
+        return len(self._histories)
+
+    async def get(self, context_id: str) -> list[dict]:
+        """Return a copy of the conversation history (empty if unknown or expired)."""
+        return list(self._histories.get(context_id, []))
+
+    async def replace(self, context_id: str, history: list[dict]) -> None:
+        """Overwrite a conversation, e.g. with a full history sent by a legacy client."""
+        self._set(context_id, list(history[-self.max_messages :]))
+
+    async def append_turn(self, context_id: str, question: str, answer: str) -> None:
+        """Record one finished question/answer exchange."""
+        history = list(self._histories.get(context_id, []))
+        history.append({"role": "user", "content": question})
+        history.append({"role": "assistant", "content": answer})
+        self._set(context_id, history[-self.max_messages :])
+
+    async def clear(self, context_id: str) -> None:
+        self._histories.pop(context_id)
+
+    def _set(self, context_id: str, history: list[dict]) -> None:
+        self._histories.set(context_id, history)
+        if context_id not in self._histories:
+            # Larger than the whole store; the cache dropped it rather than keep an older copy
+            print(
+                f"[Conversation Store] Conversation {context_id} exceeds "
+                f"{self._histories.max_bytes} bytes; its history was dropped"
+            )
+
+
+class SQLiteConversationStore:
+    """ConversationStore kept in a SQLite file shared by all manager processes.
+
+    Every read and write goes to the database (WAL mode), so a conversation
+    continues correctly whichever process receives the next turn. Queries run
+    one at a time, in order, on the store's own thread. Conversations idle
+    longer than `idle_ttl` are deleted now and then.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        idle_ttl: float = CONVERSATION_IDLE_TTL,
+        max_messages: int = MAX_MESSAGES_PER_CONVERSATION,
+    ):
+        self.path = path
+        self.idle_ttl = idle_ttl
+        self.max_messages = max_messages
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Only the store's thread uses the connection (after this setup)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversations "
+            "(context_id TEXT PRIMARY KEY, updated_at REAL NOT NULL, history TEXT NOT NULL)"
+        )
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="conversations")
+        atexit.register(self._thread.shutdown)
+
+    def __len__(self) -> int:
+        return self._thread.submit(
+            lambda: self._conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+        ).result()
+
+    async def _run(self, query, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._thread, query, *args)
+
+    async def get(self, context_id: str) -> list[dict]:
+        return await self._run(self._get, context_id)
+
+    async def replace(self, context_id: str, history: list[dict]) -> None:
+        await self._run(self._replace, context_id, history)
+
+    async def append_turn(self, context_id: str, question: str, answer: str) -> None:
+        await self._run(self._append_turn, context_id, question, answer)
+
+    async def clear(self, context_id: str) -> None:
+        await self._run(self._clear, context_id)
+
+    def _get(self, context_id: str) -> list[dict]:
+        row = self._conn.execute(
+            "SELECT history FROM conversations WHERE context_id = ? AND updated_at > ?",
+            (context_id, time.time() - self.idle_ttl),
+        ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def _replace(self, context_id: str, history: list[dict]) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO conversations VALUES (?, ?, ?)",
+                (context_id, time.time(), json.dumps(history[-self.max_messages :])),
+            )
+            self._writes += 1
+            if self._writes % COMPACT_EVERY_WRITES == 0:
+                self._conn.execute(
+                    "DELETE FROM conversations WHERE updated_at <= ?",
+                    (time.time() - self.idle_ttl,),
+                )
+
+    def _append_turn(self, context_id: str, question: str, answer: str) -> None:
+        history = self._get(context_id)
+        history.append({"role": "user", "content": question})
+        history.append({"role": "assistant", "content": answer})
+        self._replace(context_id, history)
+
+    def _clear(self, context_id: str) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM conversations WHERE context_id = ?", (context_id,))
+
+
+def build_conversation_store() -> ConversationStore | SQLiteConversationStore:
+    """A shared SQLite store if SHARED_STATE_DIR is set, else an in-memory one."""
+    if SHARED_STATE_DIR:
+        return SQLiteConversationStore(os.path.join(SHARED_STATE_DIR, "conversations.sqlite"))
+    return ConversationStore()
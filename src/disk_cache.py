@@ -0,0 +1,176 @@
+"""
+Disk Answer Cache - SQLite-backed answer cache that survives restarts
+
+A second tier behind the in-memory answer cache. The database runs in WAL
+mode, so several processes of the same worker can read it concurrently while
+one of them writes. Neither reads nor writes run on the event loop: reads
+are awaited from a reader thread, so a lock held by another process only
+delays the lookup waiting for it, and writes are queued and committed in
+batches by a background thread, which also compacts the table (expired rows
+first, then the oldest rows above the size limit).
+
+Before the first lookup the most recent live answers are loaded into memory.
+"""
+
+import asyncio
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DISK_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_DISK_SIZE", "100000"))
+DISK_CACHE_COMPACT_INTERVAL = float(os.getenv("ANSWER_CACHE_COMPACT_INTERVAL", "300"))
+
+# Max queued writes committed in one transaction
+WRITE_BATCH_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key TEXT PRIMARY KEY,
+    answer TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_created_at ON answers (created_at);
+"""
+
+_STOP = object()
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class DiskAnswerCache:
+    """Persistent key -> answer store with write-behind and TTL compaction."""
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float,
+        max_entries: int = DISK_CACHE_MAX_ENTRIES,
+        compact_interval: float = DISK_CACHE_COMPACT_INTERVAL,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.compact_interval = compact_interval
+        self.writes_dropped = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Only the reader thread uses the connection (after this setup)
+        self._reader = _connect(path)
+        self._reader.executescript(SCHEMA)
+        self._reader_thread = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"disk-cache-reads-{os.path.basename(path)}"
+        )
+
+        self._pending: queue.Queue = queue.Queue(maxsize=10 * WRITE_BATCH_SIZE)
+        self._writer = threading.Thread(
+            target=self._write_loop, name=f"disk-cache-{os.path.basename(path)}", daemon=True
+        )
+        self._writer.start()
+        atexit.register(self.close)
+
+    async def _read(self, query, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._reader_thread, query, *args)
+
+    async def get(self, key: str) -> tuple[str, float] | None:
+        """Return (answer, seconds to live) for a live entry, or None."""
+        return await self._read(self._get, key)
+
+    async def recent(self, limit: int) -> list[tuple[str, str, float]]:
+        """The `limit` newest live entries as (key, answer, seconds to live), oldest first."""
+        return await self._read(self._recent, limit)
+
+    def _get(self, key: str) -> tuple[str, float] | None:
+        now = time.time()
+        row = self._reader.execute(
+            "SELECT answer, expires_at FROM answers WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone()
+        return (row[0], row[1] - now) if row else None
+
+    def _recent(self, limit: int) -> list[tuple[str, str, float]]:
+        now = time.time()
+        rows = self._reader.execute(
+            "SELECT key, answer, expires_at FROM answers WHERE expires_at > ? "
+            "ORDER BY created_at DESC LIMIT ?",
+            (now, limit),
+        ).fetchall()
+        return [(key, answer, expires_at - now) for key, answer, expires_at in reversed(rows)]
+
+    def put(self, key: str, answer: str) -> None:
+        """Queue an answer for writing; never blocks the caller."""
+        try:
+            self._pending.put_nowait((key, answer, time.time()))
+        except queue.Full:
+            self.writes_dropped += 1
+
+    def close(self) -> None:
+        """Flush queued writes and stop the reader and writer threads."""
+        self._reader_thread.shutdown(wait=False)
+        if self._writer.is_alive():
+            self._pending.put(_STOP)
+            self._writer.join(timeout=5.0)
+
+    def _write_loop(self) -> None:
+        conn = _connect(self.path)
+        next_compaction = time.monotonic()
+        while True:
+            timeout = max(0.0, next_compaction - time.monotonic())
+            try:
+                batch = [self._pending.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            while batch and batch[-1] is not _STOP and len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = bool(batch) and batch[-1] is _STOP
+            rows = [
+                (key, answer, created_at, created_at + self.ttl)
+                for key, answer, created_at in (item for item in batch if item is not _STOP)
+            ]
+            try:
+                if rows:
+                    with conn:
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)", rows
+                        )
+                if time.monotonic() >= next_compaction:
+                    self._compact(conn)
+                    next_compaction = time.monotonic() + self.compact_interval
+            except sqlite3.Error as e:
+                print(f"[Disk Cache] Write to {self.path} failed: {e}")
+
+            if stop:
+                conn.close()
+                return
+
+    def _compact(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            expired = conn.execute(
+                "DELETE FROM answers WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            (count,) = conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+            overflow = max(0, count - self.max_entries)
+            if overflow:
+                conn.execute(
+                    "DELETE FROM answers WHERE key IN "
+                    "(SELECT key FROM answers ORDER BY created_at LIMIT ?)",
+                    (overflow,),
+                )
+        if expired or overflow:
+            print(
+                f"[Disk Cache] Compacted {self.path}: "
+                f"{expired} expired, {overflow} over the size limit"
+            )
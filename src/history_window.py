@@ -0,0 +1,220 @@
+"""
+History Window - keep worker prompts within a token budget
+
+Token counts use the tokenizer of the node's model and are memoized per
+message and model, so in a long conversation only the newest turns are ever
+tokenized; older turns are looked up. The window keeps the system prompt and
+the current question, then adds history from the most recent turn backwards
+until the budget is used up.
+
+Turns that fall out of the window are folded into a rolling summary per
+conversation. The summary is extended in the background with only the newly
+dropped turns and is sent to the model in place of the turns it covers.
+"""
+
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from model_config import NodeConfig, node_config
+from ttl_cache import LRUTTLCache
+
+if TYPE_CHECKING:  # resilient_llm imports this module (through rate_limiter)
+    from resilient_llm import LLMCaller
+
+# Total prompt budget: system prompt + kept history + current question
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+
+# Fixed cost of each chat message (role, separators) on top of its content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Fallback estimate when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+# Summarize once at least this many messages have fallen out of the window
+SUMMARY_BATCH_MESSAGES = int(os.getenv("SUMMARY_BATCH_MESSAGES", "4"))
+SUMMARY_MAX_CONTEXTS = int(os.getenv("SUMMARY_MAX_CONTEXTS", "10000"))
+SUMMARY_IDLE_TTL = float(os.getenv("SUMMARY_IDLE_TTL", "3600"))
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a conversation between a user and an expert assistant.
+
+Update the existing summary with the new messages. Keep facts, names, numbers, decisions, open questions and anything the user may refer back to. Drop small talk. Write in plain prose, at most 200 words. Respond with the updated summary only."""
+
+
+@lru_cache(maxsize=32)
+def _encoder(model: str):
+    """The tiktoken encoder for `model`, or None to estimate."""
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # tiktoken missing or its encoding files unavailable: use the estimate
+        return None
+
+
+@lru_cache(maxsize=65536)
+def count_tokens(content: str, model: str) -> int:
+    """Tokens of one message for `model`, memoized so each turn is tokenized only once."""
+    encoder = _encoder(model)
+    if encoder is None:
+        content_tokens = (len(content) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    else:
+        content_tokens = len(encoder.encode(content, disallowed_special=()))
+    return content_tokens + MESSAGE_OVERHEAD_TOKENS
+
+
+@dataclass
+class HistoryWindow:
+    history: list[dict]
+    history_tokens: int
+    dropped_messages: int
+    dropped_tokens: int
+
+
+def window_history(
+    history: list[dict],
+    system_prompt: str,
+    question: str,
+    model: str,
+    budget: int = PROMPT_TOKEN_BUDGET,
+    summary: str | None = None,
+) -> HistoryWindow:
+    """Keep the most recent turns that fit next to the system prompt and question.
+
+    Tokens are counted with `model`'s tokenizer. A `summary` of earlier turns,
+    if any, is part of the prompt and is subtracted from the budget first.
+    """
+    available = budget - count_tokens(system_prompt, model) - count_tokens(question, model)
+    if summary:
+        available -= count_tokens(summary, model)
+
+    kept_tokens = 0
+    start = len(history)
+    for index in range(len(history) - 1, -1, -1):
+        tokens = count_tokens(history[index]["content"], model)
+        if kept_tokens + tokens > available:
+            break
+        kept_tokens += tokens
+        start = index
+
+    # Don't open the window with an assistant reply whose question was cut
+    if start < len(history) and history[start]["role"] == "assistant":
+        kept_tokens -= count_tokens(history[start]["content"], model)
+        start += 1
+
+    dropped_tokens = sum(count_tokens(turn["content"], model) for turn in history[:start])
+    return HistoryWindow(
+        history=history[start:],
+        history_tokens=kept_tokens,
+        dropped_messages=start,
+        dropped_tokens=dropped_tokens,
+    )
+
+
+def _message_key(turn: dict) -> str:
+    return hashlib.sha1(f"{turn['role']}\0{turn['content']}".encode()).hexdigest()
+
+
+@dataclass
+class RollingSummary:
+    text: str
+    covered: int  # Number of leading history messages the summary covers
+    last_key: str  # Key of the last covered message, to re-find it in the history
+
+
+class RollingSummarizer:
+    """Per-conversation rolling summaries, generated once and extended incrementally."""
+
+    def __init__(
+        self,
+        llm: "LLMCaller",
+        config: NodeConfig | None = None,
+        max_contexts: int = SUMMARY_MAX_CONTEXTS,
+        idle_ttl: float = SUMMARY_IDLE_TTL,
+    ):
+        self.llm = llm
+        # SUMMARY_MODEL, SUMMARY_TEMPERATURE, SUMMARY_MAX_TOKENS (read when created, after .env)
+        self.config = config or node_config("summary", temperature=0, max_tokens=300)
+        self._summaries = LRUTTLCache(
+            max_entries=max_contexts, ttl=idle_ttl, sliding=True
+        )
+        self._running: dict[str, asyncio.Task] = {}
+
+    def lookup(self, context_id: str, history: list[dict]) -> tuple[str | None, int]:
+        """Return the cached summary and how many leading messages it replaces."""
+        entry = self._summaries.get(context_id)
+        if entry is None:
+            return None, 0
+
+        covered = entry.covered
+        if 0 < covered <= len(history) and _message_key(history[covered - 1]) == entry.last_key:
+            return entry.text, covered
+
+        # The client may have trimmed old messages; find the last covered one
+        for index in range(len(history) - 1, -1, -1):
+            if _message_key(history[index]) == entry.last_key:
+                return entry.text, index + 1
+        return None, 0
+
+    def schedule(
+        self,
+        context_id: str,
+        summary: str | None,
+        dropped: list[dict],
+        covered: int,
+    ) -> bool:
+        """Extend the summary with newly dropped messages in the background.
+
+        `covered` is the number of leading history messages the extended
+        summary will cover. Returns True if a summarization was started.
+        """
+        if len(dropped) < SUMMARY_BATCH_MESSAGES:
+            return False
+        running = self._running.get(context_id)
+        if running is not None and not running.done():
+            return False  # The next turn picks up whatever this one misses
+
+        task = asyncio.create_task(self._extend(context_id, summary, dropped, covered))
+        self._running[context_id] = task
+        task.add_done_callback(
+            lambda t: self._running.get(context_id) is t and self._running.pop(context_id)
+        )
+        return True
+
+    async def _extend(
+        self,
+        context_id: str,
+        summary: str | None,
+        dropped: list[dict],
+        covered: int,
+    ) -> None:
+        transcript = "\n\n".join(f"{turn['role']}: {turn['content']}" for turn in dropped)
+        try:
+            response = await self.llm.complete(
+                messages=[
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                    {
+                        "role": "user",
+                        "content": f"Existing summary:\n{summary or '(none yet)'}"
+                        f"\n\nNew messages:\n{transcript}",
+                    },
+                ],
+                **self.config.params(),
+            )
+        except Exception as e:
+            print(f"[History Summary] Summarizing context {context_id} failed: {e}")
+            return
+
+        text = (response.choices[0].message.content or "").strip()
+        if text:
+            self._summaries.set(
+                context_id,
+                RollingSummary(text=text, covered=covered, last_key=_message_key(dropped[-1])),
+            )
@@ -0,0 +1,41 @@
+"""
+Metrics - a Prometheus text endpoint for each agent
+
+`metrics_routes("hr", admission.metrics, ...)` serves GET /metrics. Each
+collector returns a flat {name: number} dict, where a name may carry its own
+labels, e.g. 'llm_requests_total{model="gpt-4"}'. Every sample is also
+labelled with the agent name and the process id, so the processes of an
+agent served with --workers N can be told apart (each reports its own
+counters).
+"""
+
+import os
+from collections.abc import Callable
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+Collector = Callable[[], dict[str, float]]
+
+
+def render_metrics(agent: str, collectors: tuple[Collector, ...]) -> str:
+    labels = f'agent="{agent}",pid="{os.getpid()}"'
+    lines = []
+    for collect in collectors:
+        for name, value in collect().items():
+            name, _, own_labels = name.partition("{")
+            all_labels = f"{labels},{own_labels.rstrip('}')}" if own_labels else labels
+            lines.append(f"a2a_{name}{{{all_labels}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_routes(agent: str, *collectors: Collector) -> list[Route]:
+    """Starlette route serving the collectors' samples at /metrics."""
+
+    async def metrics(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(
+            render_metrics(agent, collectors), media_type="text/plain; version=0.0.4"
+        )
+
+    return [Route("/metrics", metrics, methods=["GET"])]
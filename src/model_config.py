@@ -0,0 +1,51 @@
+"""
+Model Config - model, temperature and max_tokens per LLM node
+
+Each node that calls the LLM reads its own settings by name, e.g. the
+router's ROUTER_MODEL, ROUTER_TEMPERATURE and ROUTER_MAX_TOKENS. Unset values
+fall back to the node's defaults, and the model to MODEL_NAME, so a small,
+fast model can route while the experts keep the large one:
+
+    MODEL_NAME=gpt-4 ROUTER_MODEL=gpt-4o-mini
+
+Nodes: ROUTER (manager), HR and TECH (experts), SUMMARY (rolling history
+summaries). A new node only needs a name and its defaults:
+
+    EXPERT_LLM = node_config("tech", temperature=0.7, max_tokens=1024)
+    answer = await llm.stream(on_delta, messages=messages, **EXPERT_LLM.params())
+"""
+
+import os
+from dataclasses import dataclass
+
+DEFAULT_MODEL = "gpt-4"
+
+
+@dataclass(frozen=True)
+class NodeConfig:
+    node: str
+    model: str
+    temperature: float
+    max_tokens: int
+
+    def params(self) -> dict:
+        """Keyword arguments for a chat completion call."""
+        return {
+            "model": self.model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+        }
+
+    def describe(self) -> str:
+        return f"{self.node}: {self.model} (temperature {self.temperature}, max_tokens {self.max_tokens})"
+
+
+def node_config(node: str, temperature: float, max_tokens: int) -> NodeConfig:
+    """Settings of one node from <NODE>_MODEL/_TEMPERATURE/_MAX_TOKENS, else the defaults."""
+    prefix = node.upper()
+    return NodeConfig(
+        node=node,
+        model=os.getenv(f"{prefix}_MODEL") or os.getenv("MODEL_NAME", DEFAULT_MODEL),
+        temperature=float(os.getenv(f"{prefix}_TEMPERATURE", str(temperature))),
+        max_tokens=int(os.getenv(f"{prefix}_MAX_TOKENS", str(max_tokens))),
+    )
@@ -0,0 +1,145 @@
+"""
+Question Protocol - the typed payload exchanged between client, manager and workers
+
+A question travels as an A2A DataPart holding a QuestionPayload: the question,
+optional conversation history, routing metadata and a protocol version. The
+A2A transport serializes it once as part of the JSON-RPC body, so no hop has
+to encode or decode JSON inside a text part.
+
+Older peers that send plain text, or JSON with "current_question" inside a
+TextPart, are still understood.
+
+A request that fails still ends its task: instead of a JSON-RPC error
+response, the executor sends a final status (`rejected` for an overload,
+`failed` otherwise) with the JSON-RPC error under "error" in its metadata.
+`raise_for_failed_task` turns it back into the error on the client side.
+"""
+
+import json
+from typing import Literal
+
+from a2a.client.errors import A2AClientJSONRPCError
+from a2a.types import (
+    DataPart,
+    InternalError,
+    InvalidParamsError,
+    JSONRPCError,
+    JSONRPCErrorResponse,
+    Message,
+    Part,
+    Task,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+)
+from a2a.utils.errors import ServerError
+from pydantic import BaseModel, ValidationError
+from typing_extensions import TypedDict
+
+from admission import OVERLOADED_ERROR_CODE
+
+PROTOCOL_VERSION = 1
+
+
+class ChatTurn(TypedDict):
+    role: Literal["user", "assistant"]
+    content: str
+
+
+class RoutingInfo(TypedDict, total=False):
+    expert: Literal["TECH", "HR"]
+    source: str  # Which router path made the decision (local, cache, llm)
+
+
+class QuestionPayload(BaseModel):
+    version: int = PROTOCOL_VERSION
+    question: str
+    # None means "use the history the receiver keeps for this conversation"
+    history: list[ChatTurn] | None = None
+    routing: RoutingInfo | None = None
+
+
+def question_part(
+    question: str,
+    history: list[dict] | None = None,
+    routing: dict | None = None,
+) -> Part:
+    """Build the DataPart for a question.
+
+    The data is assembled from plain dicts, so an already-validated history can
+    be forwarded as is without another validation or serialization pass.
+    """
+    data = {"version": PROTOCOL_VERSION, "question": question}
+    if history is not None:
+        data["history"] = history
+    if routing is not None:
+        data["routing"] = routing
+    return Part(root=DataPart(data=data))
+
+
+def parse_question(message: Message | None) -> QuestionPayload:
+    """Validate the question payload of an incoming message.
+
+    Raises a ServerError with InvalidParamsError if a DataPart is malformed,
+    so the caller gets an invalid-params error rather than an internal one.
+    """
+    parts = message.parts if message else []
+
+    for part in parts:
+        if isinstance(part.root, DataPart) and "question" in part.root.data:
+            try:
+                return QuestionPayload.model_validate(part.root.data)
+            except ValidationError as e:
+                raise ServerError(
+                    error=InvalidParamsError(message=f"Invalid question payload: {e}")
+                ) from e
+
+    text = "\n".join(part.root.text for part in parts if hasattr(part.root, "text"))
+    return parse_legacy_text(text or "No input provided")
+
+
+def parse_legacy_text(raw_input: str) -> QuestionPayload:
+    """Parse a text message which may contain JSON with history, or plain text."""
+    try:
+        data = json.loads(raw_input)
+        if isinstance(data, dict) and "current_question" in data:
+            return QuestionPayload(
+                question=data["current_question"],
+                history=data.get("conversation_history", []),
+            )
+    except (json.JSONDecodeError, TypeError, ValidationError):
+        pass
+    # Fallback: treat as plain question without history
+    return QuestionPayload(question=raw_input)
+
+
+def failure_status(task_id: str, context_id: str, error: Exception) -> TaskStatusUpdateEvent:
+    """Final status for a request that raised `error`, so its task is closed too.
+
+    The error is kept in the metadata as a JSON-RPC error; exceptions other
+    than a ServerError become an internal error.
+    """
+    if isinstance(error, ServerError) and error.error is not None:
+        rpc_error = error.error
+    else:
+        rpc_error = InternalError(message=f"{type(error).__name__}: {error}")
+    state = TaskState.rejected if rpc_error.code == OVERLOADED_ERROR_CODE else TaskState.failed
+    return TaskStatusUpdateEvent(
+        task_id=task_id,
+        context_id=context_id,
+        status=TaskStatus(state=state),
+        final=True,
+        metadata={"error": rpc_error.model_dump(mode="json", exclude_none=True)},
+    )
+
+
+def raise_for_failed_task(task: Task) -> None:
+    """Raise the error a failed or rejected task ended with, as A2AClientJSONRPCError."""
+    if task.status.state not in (TaskState.failed, TaskState.rejected):
+        return
+    error = (task.metadata or {}).get("error")
+    if error:
+        rpc_error = JSONRPCError.model_validate(error)
+    else:
+        rpc_error = InternalError(message=f"Task {task.id} {task.status.state.value}")
+    raise A2AClientJSONRPCError(JSONRPCErrorResponse(error=rpc_error))
@@ -0,0 +1,210 @@
+"""
+Rate Limiter - per-model request and token budgets for LLM calls
+
+Providers limit requests per minute (RPM) and tokens per minute (TPM) per
+model. Every LLM call first reserves one request and its estimated token
+cost (prompt tokens plus max_tokens) from the model's token buckets. Once
+the response reports its usage, the reservation is settled: unused tokens
+go back into the bucket, extra tokens are taken as debt.
+
+Callers that don't fit the budget wait in arrival order instead of failing,
+so a burst is smoothed out rather than answered with 429s. Limits apply per
+process; give each agent process its share of the account's limits.
+
+    LLM_RATE_LIMITS="gpt-4=500:30000,gpt-4o-mini=5000:2000000"   # model=RPM:TPM
+    LLM_RPM=0 LLM_TPM=0                                             # other models, 0 = unlimited
+
+Usage:
+
+    async with rate_limiter.reserve(MODEL_NAME, messages, max_tokens) as reservation:
+        response = await client.chat.completions.create(...)
+        reservation.settle(response.usage)
+"""
+
+import asyncio
+import os
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+
+from history_window import count_tokens
+
+LLM_RPM = float(os.getenv("LLM_RPM", "0"))
+LLM_TPM = float(os.getenv("LLM_TPM", "0"))
+
+
+def parse_limits(spec: str) -> dict[str, tuple[float, float]]:
+    """Parse "model=RPM:TPM,..." into {model: (rpm, tpm)}."""
+    limits = {}
+    for entry in filter(None, (item.strip() for item in spec.split(","))):
+        model, _, values = entry.rpartition("=")
+        rpm, _, tpm = values.partition(":")
+        limits[model.strip()] = (float(rpm or 0), float(tpm or 0))
+    return limits
+
+
+LLM_RATE_LIMITS = parse_limits(os.getenv("LLM_RATE_LIMITS", ""))
+
+
+def prompt_tokens(messages: list[dict], model: str) -> int:
+    return sum(count_tokens(message["content"], model) for message in messages)
+
+
+class TokenBucket:
+    """Holds up to `per_minute` units and refills at `per_minute` per minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill()
+        # A call bigger than the whole bucket waits for a full bucket, not forever
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Take (positive) or give back (negative) units; the level may go negative."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class _ModelBudget:
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        # Lock waiters are woken in arrival order, which makes the queue fair
+        self.lock = asyncio.Lock()
+        self.queued = 0
+        # Set when a settled call gives unused tokens back, to wake the head of the queue
+        self.refunded = asyncio.Event()
+
+
+class Reservation:
+    """Tokens reserved for one call; settle it with the response's usage."""
+
+    def __init__(self, model: str, prompt_tokens: int, max_tokens: int):
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        # Upper estimate: the prompt plus the whole completion budget
+        self.estimated_tokens = prompt_tokens + max_tokens
+        self.actual_tokens: int | None = None
+
+    def settle(self, usage=None, completion: str | None = None) -> None:
+        """Record the actual usage: `response.usage`, or else a count of the completion text.
+
+        Without either, the estimate is kept.
+        """
+        if usage is not None and getattr(usage, "total_tokens", None) is not None:
+            self.actual_tokens = usage.total_tokens
+        elif completion is not None:
+            self.actual_tokens = self.prompt_tokens + count_tokens(completion, self.model)
+
+
+class RateLimiter:
+    """Token buckets for RPM and TPM per model, with a fair wait queue."""
+
+    def __init__(
+        self,
+        limits: dict[str, tuple[float, float]] | None = None,
+        default_rpm: float = LLM_RPM,
+        default_tpm: float = LLM_TPM,
+    ):
+        self.limits = LLM_RATE_LIMITS if limits is None else limits
+        self.default_limits = (default_rpm, default_tpm)
+        # Per model: "requests", "waited", "estimated_tokens", "actual_tokens"
+        self.stats: dict[str, Counter] = {}
+        self.wait_seconds: Counter[str] = Counter()
+        self._budgets: dict[str, _ModelBudget] = {}
+
+    def _budget(self, model: str) -> _ModelBudget:
+        budget = self._budgets.get(model)
+        if budget is None:
+            budget = _ModelBudget(*self.limits.get(model, self.default_limits))
+            self._budgets[model] = budget
+            self.stats[model] = Counter()
+        return budget
+
+    @asynccontextmanager
+    async def reserve(self, model: str, messages: list[dict], max_tokens: int):
+        """Wait for budget for one call to `model`, then reconcile its usage on exit."""
+        budget = self._budget(model)
+        stats = self.stats[model]
+        reservation = Reservation(model, prompt_tokens(messages, model), max_tokens)
+        estimate = reservation.estimated_tokens
+
+        if budget.requests or budget.tokens:
+            await self._wait_for_budget(model, budget, estimate)
+        stats["requests"] += 1
+        stats["estimated_tokens"] += estimate
+
+        try:
+            yield reservation
+        finally:
+            if reservation.actual_tokens is not None:
+                stats["actual_tokens"] += reservation.actual_tokens
+                if budget.tokens:
+                    budget.tokens.adjust(reservation.actual_tokens - estimate)
+                    if reservation.actual_tokens < estimate:
+                        budget.refunded.set()
+
+    async def _wait_for_budget(self, model: str, budget: _ModelBudget, estimate: int) -> None:
+        started_at = time.monotonic()
+        budget.queued += 1
+        try:
+            async with budget.lock:
+                while True:
+                    wait = max(
+                        budget.requests.wait_time(1) if budget.requests else 0.0,
+                        budget.tokens.wait_time(estimate) if budget.tokens else 0.0,
+                    )
+                    if wait <= 0:
+                        break
+                    budget.refunded.clear()
+                    try:
+                        await asyncio.wait_for(budget.refunded.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                if budget.requests:
+                    budget.requests.adjust(1)
+                if budget.tokens:
+                    budget.tokens.adjust(estimate)
+        finally:
+            budget.queued -= 1
+
+        waited = time.monotonic() - started_at
+        if waited > 0.01:
+            self.stats[model]["waited"] += 1
+            self.wait_seconds[model] += waited
+            print(f"[Rate Limiter] Waited {waited:.2f}s for {model} budget ({budget.queued} still queued)")
+
+    def queued(self, model: str) -> int:
+        """Number of calls waiting for `model`'s budget."""
+        budget = self._budgets.get(model)
+        return budget.queued if budget else 0
+
+    def metrics(self) -> dict[str, float]:
+        samples = {}
+        for model, stats in self.stats.items():
+            label = f'{{model="{model}"}}'
+            budget = self._budgets[model]
+            samples[f"llm_rate_limit_queued{label}"] = budget.queued
+            samples[f"llm_rate_limit_requests_total{label}"] = stats["requests"]
+            samples[f"llm_rate_limit_waited_total{label}"] = stats["waited"]
+            samples[f"llm_rate_limit_wait_seconds_total{label}"] = round(self.wait_seconds[model], 3)
+            samples[f"llm_rate_limit_estimated_tokens_total{label}"] = stats["estimated_tokens"]
+            samples[f"llm_rate_limit_actual_tokens_total{label}"] = stats["actual_tokens"]
+            if budget.tokens:
+                samples[f"llm_rate_limit_tokens_available{label}"] = round(budget.tokens.level)
+        return samples
+
+
+# One limiter per process, shared by every agent (and colocated expert) in it
+rate_limiter = RateLimiter()
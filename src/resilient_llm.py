@@ -0,0 +1,382 @@
+"""
+Resilient LLM - retries with backoff, and hedged requests, for every LLM call
+
+Each agent makes its LLM calls through an `LLMCaller` wrapping its OpenAI client:
+
+- Rate limits (429), server errors (5xx), timeouts and dropped connections are
+  retried up to LLM_MAX_RETRIES times, with exponential backoff and full
+  jitter. A Retry-After header from the provider is used instead of the
+  computed delay; a hint longer than LLM_BACKOFF_MAX is not waited out, the
+  error is raised right away. A stream is only retried until its first token,
+  since later tokens have already been passed on.
+- With LLM_HEDGE=true, a call that has no first token (or, not streaming, no
+  response) by the model's recent p95 latency gets a duplicate request.
+  Whichever answers first is used and the other one is cancelled. The p95 is
+  taken over the model's last LLM_LATENCY_WINDOW attempts, so the threshold
+  follows the provider's current speed; hedging starts once
+  LLM_HEDGE_MIN_SAMPLES latencies are known. Like those latencies, the wait
+  counts from when the call got its rate limit budget, and no hedge is sent
+  while other calls are queued for the model's budget.
+- Every attempt, retries and hedges included, reserves its budget from the
+  rate limiter. Streams ask for their token usage to settle it; a server that
+  rejects `stream_options` is asked without it from then on, and the usage
+  is estimated from the answer instead.
+
+The OpenAI client's own retries are switched off, so attempts aren't multiplied.
+
+Usage:
+
+    llm = LLMCaller(client)
+    response = await llm.complete(model=MODEL_NAME, messages=messages, max_tokens=10)
+    answer = await llm.stream(on_delta, model=MODEL_NAME, messages=messages, max_tokens=1024)
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import Counter, deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AsyncExitStack
+from email.utils import parsedate_to_datetime
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+from rate_limiter import Reservation, rate_limiter
+
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "200"))
+# Ask streams for their token usage (stream_options); turned off by itself on a 400
+LLM_STREAM_USAGE = os.getenv("LLM_STREAM_USAGE", "true").lower() in ("1", "true", "yes")
+
+# What a hedge waits for: the first token of a stream, or a whole response
+FIRST_TOKEN = "first_token"
+RESPONSE = "response"
+
+
+def retry_after_header(headers) -> float | None:
+    """Seconds from a Retry-After (or retry-after-ms) header, if there is one."""
+    if value := headers.get("retry-after-ms"):
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    if value := headers.get("retry-after"):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+def retry_delay(
+    error: Exception,
+    retry: int,
+    base: float = LLM_BACKOFF_BASE,
+    cap: float = LLM_BACKOFF_MAX,
+) -> float | None:
+    """Seconds to wait before retry number `retry` (from 0), or None if `error` isn't retryable."""
+    if isinstance(error, openai.APIStatusError):
+        if error.status_code not in (408, 409, 429) and error.status_code < 500:
+            return None
+        hinted = retry_after_header(error.response.headers)
+        if hinted is not None:
+            return hinted if hinted <= cap else None
+    # Connection errors include timeouts; a stream being read raises httpx's own
+    elif not isinstance(error, (openai.APIConnectionError, httpx.TransportError)):
+        return None
+    # Full jitter: spreads out the retries of calls that failed together
+    return random.uniform(0, min(cap, base * 2**retry))
+
+
+class LLMStats:
+    """Call counters and recent attempt latencies per model, for hedging and /metrics."""
+
+    def __init__(self, window: int = LLM_LATENCY_WINDOW):
+        self.window = window
+        # Per model: "calls", "attempts", "retries", "hedges", "hedges_skipped",
+        # "hedge_wins", "failures"
+        self.counts: dict[str, Counter] = {}
+        self._latencies: dict[tuple[str, str], deque[float]] = {}
+
+    def count(self, model: str, name: str) -> None:
+        self.counts.setdefault(model, Counter())[name] += 1
+
+    def record(self, model: str, kind: str, seconds: float) -> None:
+        samples = self._latencies.get((model, kind))
+        if samples is None:
+            samples = self._latencies[(model, kind)] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, model: str, kind: str, fraction: float, min_samples: int = 1) -> float | None:
+        """Nearest-rank percentile of the recent latencies, or None with too few of them."""
+        samples = sorted(self._latencies.get((model, kind), ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+    def metrics(self) -> dict[str, float]:
+        samples = {}
+        for model, counts in self.counts.items():
+            label = f'model="{model}"'
+            for name in ("calls", "attempts", "retries", "hedges", "hedges_skipped", "hedge_wins", "failures"):
+                samples[f"llm_{name}_total{{{label}}}"] = counts[name]
+            for kind in (FIRST_TOKEN, RESPONSE):
+                for quantile in (0.5, 0.95):
+                    value = self.percentile(model, kind, quantile)
+                    if value is not None:
+                        samples[f'llm_{kind}_seconds{{{label},quantile="{quantile}"}}'] = round(value, 3)
+        return samples
+
+
+# One set of stats per process, shared by every agent (and colocated expert) in it
+llm_stats = LLMStats()
+
+
+class _OpenStream:
+    """A streaming attempt, read up to and including its first token."""
+
+    def __init__(self, stack: AsyncExitStack, reservation: Reservation, head: list, rest: AsyncIterator):
+        self.stack = stack  # Holds the rate limit reservation and the HTTP stream
+        self.reservation = reservation
+        self.head = head
+        self.rest = rest
+
+    async def chunks(self) -> AsyncIterator:
+        for chunk in self.head:
+            yield chunk
+        async for chunk in self.rest:
+            yield chunk
+
+    async def close(self) -> None:
+        await self.stack.aclose()
+
+
+def _delta(chunk) -> str | None:
+    return chunk.choices[0].delta.content if chunk.choices else None
+
+
+class LLMCaller:
+    """Makes chat completion calls with retries, hedging and rate limiting."""
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        max_retries: int = LLM_MAX_RETRIES,
+        timeout: float = LLM_TIMEOUT,
+        hedge: bool = LLM_HEDGE,
+        stream_usage: bool = LLM_STREAM_USAGE,
+        stats: LLMStats = llm_stats,
+    ):
+        # Retries happen here, with hedging and the rate limiter in the loop
+        self.client = client.with_options(max_retries=0)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.hedge = hedge
+        self.stream_usage = stream_usage
+        self.stats = stats
+
+    async def complete(self, *, model: str, messages: list[dict], max_tokens: int, **params):
+        """A non-streaming chat completion; returns the response."""
+
+        async def attempt(reserved: asyncio.Event):
+            async with rate_limiter.reserve(model, messages, max_tokens) as reservation:
+                reserved.set()
+                self.stats.count(model, "attempts")
+                started_at = time.monotonic()
+                try:
+                    response = await self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        timeout=self.timeout,
+                        **params,
+                    )
+                except asyncio.CancelledError:
+                    self._record_cancelled(model, RESPONSE, started_at)
+                    raise
+                self.stats.record(model, RESPONSE, time.monotonic() - started_at)
+                reservation.settle(response.usage)
+                return response
+
+        async def discard(response) -> None:
+            return None
+
+        return await self._call(model, RESPONSE, attempt, discard)
+
+    async def stream(
+        self,
+        on_delta: Callable[[str], None],
+        *,
+        model: str,
+        messages: list[dict],
+        max_tokens: int,
+        **params,
+    ) -> str:
+        """A streaming chat completion; passes each token to `on_delta`, returns the whole answer.
+
+        Cancelling the call closes the HTTP stream, so generation stops.
+        """
+
+        async def attempt(reserved: asyncio.Event) -> _OpenStream:
+            stack = AsyncExitStack()
+            try:
+                reservation = await stack.enter_async_context(
+                    rate_limiter.reserve(model, messages, max_tokens)
+                )
+                reserved.set()
+                self.stats.count(model, "attempts")
+                started_at = time.monotonic()
+                try:
+                    stream = await self._create_stream(
+                        model=model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        stream=True,
+                        timeout=self.timeout,
+                        **params,
+                    )
+                    await stack.enter_async_context(stream)
+                    # Read until the first token, so only a producing stream wins a hedge
+                    rest = aiter(stream)
+                    head = []
+                    async for chunk in rest:
+                        head.append(chunk)
+                        if _delta(chunk):
+                            break
+                except asyncio.CancelledError:
+                    self._record_cancelled(model, FIRST_TOKEN, started_at)
+                    raise
+                self.stats.record(model, FIRST_TOKEN, time.monotonic() - started_at)
+                return _OpenStream(stack, reservation, head, rest)
+            except BaseException:
+                await stack.aclose()
+                raise
+
+        opened = await self._call(model, FIRST_TOKEN, attempt, _OpenStream.close)
+
+        # Past the first token nothing is retried: the tokens have been passed on
+        async with opened.stack:
+            parts = []
+            usage = None
+            async for chunk in opened.chunks():
+                if chunk.usage:
+                    usage = chunk.usage
+                if delta := _delta(chunk):
+                    parts.append(delta)
+                    on_delta(delta)
+            answer = "".join(parts)
+            opened.reservation.settle(usage, completion=answer)
+        return answer
+
+    async def _create_stream(self, **params):
+        """Open a stream, asking for its token usage unless the server doesn't support that."""
+        if self.stream_usage:
+            try:
+                return await self.client.chat.completions.create(
+                    **params, stream_options={"include_usage": True}
+                )
+            except openai.BadRequestError as e:
+                # Older OpenAI-compatible servers reject stream_options; if the
+                # request works without it, stop asking (usage is then estimated).
+                # Other bad requests (context too long, unknown model) are raised
+                if "stream_options" not in str(e):
+                    raise
+                stream = await self.client.chat.completions.create(**params)
+                self.stream_usage = False
+                print(f"[LLM] {params['model']} rejected stream_options ({e}), streaming without usage")
+                return stream
+        return await self.client.chat.completions.create(**params)
+
+    def _record_cancelled(self, model: str, kind: str, started_at: float) -> None:
+        # A cancelled attempt (e.g. a hedge that lost) took at least this long;
+        # recording it keeps slow spells in the p95 instead of hiding them behind hedges
+        self.stats.record(model, kind, time.monotonic() - started_at)
+
+    async def _call(
+        self, model: str, kind: str, attempt: Callable[[asyncio.Event], Awaitable], discard
+    ):
+        self.stats.count(model, "calls")
+        for retry in range(self.max_retries + 1):
+            try:
+                return await self._hedged(model, kind, attempt, discard)
+            except Exception as e:
+                delay = retry_delay(e, retry) if retry < self.max_retries else None
+                if delay is None:
+                    self.stats.count(model, "failures")
+                    raise
+                self.stats.count(model, "retries")
+                print(
+                    f"[LLM] {model} call failed ({type(e).__name__}), retrying in {delay:.2f}s "
+                    f"({retry + 1}/{self.max_retries})"
+                )
+                await asyncio.sleep(delay)
+
+    async def _hedged(
+        self, model: str, kind: str, attempt: Callable[[asyncio.Event], Awaitable], discard
+    ):
+        """Run `attempt`; if it's slower than the model's p95, race a duplicate against it.
+
+        `attempt` sets the event it is given once it holds its rate limit budget.
+        """
+        delay = (
+            self.stats.percentile(model, kind, 0.95, LLM_HEDGE_MIN_SAMPLES) if self.hedge else None
+        )
+        if delay is None:
+            return await attempt(asyncio.Event())
+
+        reserved = asyncio.Event()
+        first = asyncio.create_task(attempt(reserved))
+        racers = {first}
+        # The p95 is measured from the reservation on, so is the hedge delay:
+        # time spent queueing in the rate limiter must not trigger a hedge
+        reserving = asyncio.create_task(reserved.wait())
+        try:
+            await asyncio.wait({first, reserving}, return_when=asyncio.FIRST_COMPLETED)
+            done, _ = await asyncio.wait(racers, timeout=delay)
+            if not done and rate_limiter.queued(model):
+                # The hedge would queue for the same budget, adding to the backlog
+                self.stats.count(model, "hedges_skipped")
+            elif not done:
+                self.stats.count(model, "hedges")
+                print(f"[LLM] No {kind} from {model} after {delay:.2f}s (p95), sending a hedged request")
+                racers.add(asyncio.create_task(attempt(asyncio.Event())))
+
+            # The first attempt to succeed wins; an error only counts once both failed
+            error = None
+            while racers:
+                done, racers = await asyncio.wait(racers, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None:
+                    if winner is not first:
+                        self.stats.count(model, "hedge_wins")
+                    for task in done - {winner}:
+                        await self._abandon(task, discard)
+                    return winner.result()
+                error = next(iter(done)).exception()
+            raise error
+        finally:
+            reserving.cancel()
+            for task in racers:
+                await self._abandon(task, discard)
+
+    @staticmethod
+    async def _abandon(task: asyncio.Task, discard) -> None:
+        """Cancel a losing attempt, releasing its result if it had already finished."""
+        task.cancel()
+        try:
+            result = await task
+        except (asyncio.CancelledError, Exception):
+            return
+        await discard(result)
@@ -0,0 +1,246 @@
+"""
+Response Cache - end-to-end cache of finished manager responses
+
+Keyed by the question, the conversation history it was asked in and the
+prompt version, so a repeated (question, history) pair is answered without
+routing, delegation or any LLM call. Each entry remembers which expert
+answered it, so the cache can be invalidated per expert, per prompt version
+or as a whole, e.g. after changing an expert's system prompt.
+
+`admin_routes` exposes the invalidation API over HTTP, only when ADMIN_TOKEN
+is set; requests must send it as `Authorization: Bearer <token>`:
+
+    GET    /admin/response-cache                       stats
+    DELETE /admin/response-cache                       flush everything
+    DELETE /admin/response-cache?expert=TECH           one expert's answers
+    DELETE /admin/response-cache?prompt_version=3      one prompt version
+
+With SHARED_STATE_DIR set, invalidations are also recorded in a SQLite file
+that every manager process polls, so an invalidation sent to one process
+reaches the caches of all of them within INVALIDATION_POLL_INTERVAL. The
+log's queries run on a thread of their own, like the conversation store's.
+"""
+
+import asyncio
+import atexit
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from ttl_cache import LRUTTLCache
+
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "false").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+# Bump when the expert prompts change so old answers are no longer served
+PROMPT_VERSION = os.getenv("PROMPT_VERSION", "1")
+# Directory for state shared by all manager processes; empty keeps it per process
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR", "")
+INVALIDATION_POLL_INTERVAL = 1.0
+
+# Bearer token required by the admin routes; empty leaves them unmounted
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+@dataclass
+class CachedResponse:
+    final_output: str
+    worker_response: str
+    expert: str
+    prompt_version: str
+    created_at: float
+
+    def metadata(self) -> dict:
+        """Artifact metadata telling the client the answer came from the cache."""
+        return {
+            "cached": True,
+            "cache_age_seconds": round(time.time() - self.created_at, 1),
+            "expert": self.expert,
+            "prompt_version": self.prompt_version,
+        }
+
+
+class ResponseCache:
+    """Bounded cache of finalized manager responses."""
+
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_SIZE,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+        ttl: float = RESPONSE_CACHE_TTL,
+        prompt_version: str = PROMPT_VERSION,
+        shared_dir: str = SHARED_STATE_DIR,
+    ):
+        self.prompt_version = prompt_version
+        self._responses = LRUTTLCache(
+            max_entries=max_entries,
+            ttl=ttl,
+            max_bytes=max_bytes,
+            sizeof=lambda entry: len(entry.final_output.encode()),
+        )
+        self._log = None
+        if shared_dir:
+            os.makedirs(shared_dir, exist_ok=True)
+            # Only the log's thread uses the connection (after this setup)
+            self._log = sqlite3.connect(
+                os.path.join(shared_dir, "response_cache.sqlite"),
+                timeout=5.0,
+                check_same_thread=False,
+            )
+            self._log.execute("PRAGMA journal_mode=WAL")
+            self._log.execute(
+                "CREATE TABLE IF NOT EXISTS invalidations "
+                "(id INTEGER PRIMARY KEY AUTOINCREMENT, expert TEXT, prompt_version TEXT)"
+            )
+            # Only invalidations from now on concern this process's (empty) cache
+            self._last_seen = self._log.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM invalidations"
+            ).fetchone()[0]
+            self._next_poll = 0.0
+            self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-cache")
+            atexit.register(self._thread.shutdown)
+
+    @property
+    def stats(self):
+        return self._responses.stats
+
+    def key(self, question: str, history: list[dict]) -> str:
+        canonical = json.dumps(
+            [
+                self.prompt_version,
+                question.strip(),
+                [[turn["role"], turn["content"]] for turn in history],
+            ],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    async def get(self, question: str, history: list[dict]) -> CachedResponse | None:
+        if self._log is not None:
+            await self._apply_shared_invalidations()
+        return self._responses.get(self.key(question, history))
+
+    def set(
+        self,
+        question: str,
+        history: list[dict],
+        expert: str,
+        final_output: str,
+        worker_response: str,
+    ) -> None:
+        self._responses.set(
+            self.key(question, history),
+            CachedResponse(
+                final_output=final_output,
+                worker_response=worker_response,
+                expert=expert,
+                prompt_version=self.prompt_version,
+                created_at=time.time(),
+            ),
+        )
+
+    async def invalidate(
+        self, expert: str | None = None, prompt_version: str | None = None
+    ) -> int:
+        """Drop the matching entries (all of them without filters); returns the count.
+
+        The invalidation is passed on to the other manager processes, if any.
+        """
+        if self._log is not None:
+            entry_id = await self._run(self._record_invalidation, expert, prompt_version)
+            if entry_id == self._last_seen + 1:
+                self._last_seen = entry_id
+        return self._invalidate_local(expert, prompt_version)
+
+    async def _run(self, query, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._thread, query, *args)
+
+    def _record_invalidation(self, expert: str | None, prompt_version: str | None) -> int:
+        with self._log:
+            return self._log.execute(
+                "INSERT INTO invalidations (expert, prompt_version) VALUES (?, ?)",
+                (expert, prompt_version),
+            ).lastrowid
+
+    def _read_invalidations(self, after: int) -> list[tuple]:
+        return self._log.execute(
+            "SELECT id, expert, prompt_version FROM invalidations WHERE id > ? ORDER BY id",
+            (after,),
+        ).fetchall()
+
+    async def _apply_shared_invalidations(self) -> None:
+        now = time.monotonic()
+        if now < self._next_poll:
+            return
+        self._next_poll = now + INVALIDATION_POLL_INTERVAL
+        for entry_id, expert, prompt_version in await self._run(
+            self._read_invalidations, self._last_seen
+        ):
+            if entry_id > self._last_seen:
+                self._invalidate_local(expert, prompt_version)
+                self._last_seen = entry_id
+
+    def _invalidate_local(self, expert: str | None, prompt_version: str | None) -> int:
+        if expert is None and prompt_version is None:
+            removed = len(self._responses)
+            self._responses.clear()
+            return removed
+
+        matching = [
+            key
+            for key, entry in self._responses.items()
+            if (expert is None or entry.expert == expert)
+            and (prompt_version is None or entry.prompt_version == prompt_version)
+        ]
+        for key in matching:
+            self._responses.pop(key)
+        return len(matching)
+
+    def describe(self) -> dict:
+        return {
+            **asdict(self._responses.stats),
+            "hit_rate": round(self._responses.stats.hit_rate, 3),
+            "entries": len(self._responses),
+            "bytes": self._responses.total_bytes,
+            "prompt_version": self.prompt_version,
+        }
+
+
+def admin_routes(cache: ResponseCache, token: str = ADMIN_TOKEN) -> list[Route]:
+    """Starlette routes to inspect and invalidate the response cache; none without a token."""
+    if not token:
+        print("[Response Cache] ADMIN_TOKEN not set, admin routes disabled")
+        return []
+    expected = f"Bearer {token}".encode()
+
+    async def response_cache_admin(request: Request) -> JSONResponse:
+        provided = request.headers.get("authorization", "").encode()
+        if not hmac.compare_digest(provided, expected):
+            return JSONResponse({"error": "Unauthorized"}, status_code=401)
+
+        if request.method == "GET":
+            return JSONResponse(cache.describe())
+
+        expert = request.query_params.get("expert")
+        prompt_version = request.query_params.get("prompt_version")
+        removed = await cache.invalidate(
+            expert=expert.upper() if expert else None, prompt_version=prompt_version
+        )
+        print(
+            f"[Response Cache] Invalidated {removed} responses "
+            f"(expert={expert or '*'}, prompt_version={prompt_version or '*'})"
+        )
+        return JSONResponse({"removed": removed, **cache.describe()})
+
+    return [Route("/admin/response-cache", response_cache_admin, methods=["GET", "DELETE"])]
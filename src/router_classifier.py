@@ -0,0 +1,131 @@
+"""
+Local Router - zero-LLM fast path for routing decisions
+
+A small multinomial naive Bayes classifier that labels questions as TECH or HR
+in microseconds. It is seeded from the router prompt itself (the expert
+descriptions and the labelled examples) and learns from every decision the
+LLM router makes, so the fast path covers more traffic over time.
+"""
+
+import heapq
+import math
+import os
+import re
+from collections import Counter
+
+# Max distinct tokens the router learns; the rarest are pruned beyond it
+ROUTER_MAX_VOCABULARY = int(os.getenv("ROUTER_MAX_VOCABULARY", "20000"))
+
+TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it its me my of on "
+    "or our should so that the their them this to what when where which who why "
+    "will with you your".split()
+)
+
+# Lines like: - "How do I implement a REST API?" -> TECH
+EXAMPLE_RE = re.compile(r'^-\s*"(?P<text>[^"]+)"\s*->\s*(?P<label>[A-Z]+)', re.MULTILINE)
+
+# Lines like: 1. TECH - Expert in technology, programming, ...
+EXPERT_RE = re.compile(
+    r"^\d+\.\s*(?P<label>[A-Z]+)\s*-\s*Expert in (?P<topics>.+)$", re.MULTILINE
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens without stop words, with plurals folded."""
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def seed_examples_from_prompt(prompt: str) -> list[tuple[str, str]]:
+    """Build a labelled seed set from the router prompt's experts and examples."""
+    examples = []
+    for match in EXPERT_RE.finditer(prompt):
+        for topic in match.group("topics").split(","):
+            examples.append((topic.strip(), match.group("label")))
+    for match in EXAMPLE_RE.finditer(prompt):
+        examples.append((match.group("text"), match.group("label")))
+    return examples
+
+
+class LocalRouter:
+    """Multinomial naive Bayes over word tokens with Laplace smoothing.
+
+    Only counts are kept; learning updates them in place and the log
+    probabilities of a question's tokens are computed when it is classified.
+    The vocabulary is capped at `max_vocabulary` tokens: once it grows past
+    the cap, the rarest learned tokens are pruned (seed tokens are kept).
+    """
+
+    def __init__(
+        self,
+        examples: list[tuple[str, str]],
+        alpha: float = 1.0,
+        max_vocabulary: int = ROUTER_MAX_VOCABULARY,
+    ):
+        self.alpha = alpha
+        self.max_vocabulary = max_vocabulary
+        self._doc_counts: Counter[str] = Counter()
+        self._token_counts: dict[str, Counter[str]] = {}
+        self._label_totals: Counter[str] = Counter()  # Tokens seen per label
+        self._vocabulary: Counter[str] = Counter()  # Tokens seen over all labels
+        for text, label in examples:
+            self._add(text, label)
+        self._seed_vocabulary = frozenset(self._vocabulary)
+
+    @property
+    def labels(self) -> list[str]:
+        return sorted(self._doc_counts)
+
+    def learn(self, text: str, label: str) -> None:
+        """Add one labelled question, e.g. a decision made by the LLM router."""
+        self._add(text, label)
+        if len(self._vocabulary) > self.max_vocabulary:
+            self._prune()
+
+    def classify(self, text: str) -> tuple[str, float]:
+        """Return the most likely label and its posterior probability.
+
+        Tokens never seen in training carry no evidence; a question made only
+        of unknown words therefore scores the prior, i.e. low confidence.
+        """
+        tokens = [token for token in tokenize(text) if token in self._vocabulary]
+        n_docs = sum(self._doc_counts.values())
+        n_vocab = len(self._vocabulary)
+        scores = {}
+        for label, doc_count in self._doc_counts.items():
+            counts = self._token_counts[label]
+            denominator = self._label_totals[label] + self.alpha * n_vocab
+            scores[label] = math.log(doc_count / n_docs) + sum(
+                math.log((counts[token] + self.alpha) / denominator) for token in tokens
+            )
+
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        total = sum(math.exp(score - top) for score in scores.values())
+        return best, 1.0 / total
+
+    def _add(self, text: str, label: str) -> None:
+        tokens = tokenize(text)
+        self._doc_counts[label] += 1
+        self._token_counts.setdefault(label, Counter()).update(tokens)
+        self._label_totals[label] += len(tokens)
+        self._vocabulary.update(tokens)
+
+    def _prune(self) -> None:
+        """Drop the rarest learned tokens, leaving room below the cap."""
+        keep = int(self.max_vocabulary * 0.9)
+        candidates = [token for token in self._vocabulary if token not in self._seed_vocabulary]
+        excess = len(self._vocabulary) - keep
+        for token in heapq.nsmallest(excess, candidates, key=self._vocabulary.__getitem__):
+            del self._vocabulary[token]
+            for label, counts in self._token_counts.items():
+                self._label_totals[label] -= counts.pop(token, 0)
@@ -0,0 +1,156 @@
+"""
+Semantic Answer Cache - reuse expert answers for paraphrased questions
+
+The question is embedded through an OpenAI-compatible embeddings endpoint
+and looked up in an in-memory cosine-similarity index (one NumPy matrix of
+unit vectors per namespace). A previous answer is reused when its question
+is similar enough and it was asked in the same context: same conversation
+history, summary, system prompt and model settings.
+
+Each expert uses its own namespace, so an HR answer is never served for a
+tech question. Every namespace holds a bounded number of entries; expired
+entries are reused first, otherwise the least recently used one is evicted.
+"""
+
+import os
+import time
+
+import numpy as np
+from openai import AsyncOpenAI
+
+from ttl_cache import CacheStats
+
+SEMANTIC_CACHE = os.getenv("SEMANTIC_CACHE", "false").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "5000"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "86400"))
+
+# Embeddings may come from a different (e.g. local) server than the chat model
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_BASE_URL = os.getenv("EMBEDDING_BASE_URL", os.getenv("OPENAI_BASE_URL"))
+EMBEDDING_API_KEY = os.getenv("EMBEDDING_API_KEY", os.getenv("OPENAI_API_KEY"))
+
+
+class VectorIndex:
+    """Fixed-capacity cosine-similarity index over unit vectors."""
+
+    def __init__(self, max_entries: int = SEMANTIC_CACHE_SIZE, ttl: float = SEMANTIC_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._vectors: np.ndarray | None = None  # Allocated on the first add
+        self._expires_at = np.zeros(max_entries)  # 0 marks a free slot
+        self._last_used = np.zeros(max_entries)
+        self._contexts = np.full(max_entries, "", dtype=object)
+        self._answers: list[str | None] = [None] * max_entries
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._expires_at > time.monotonic()))
+
+    def search(
+        self, vector: np.ndarray, context_key: str, threshold: float
+    ) -> tuple[str, float] | None:
+        """Best live answer in the same context with similarity >= threshold."""
+        if self._vectors is None or vector.shape[0] != self._vectors.shape[1]:
+            self.stats.misses += 1
+            return None
+
+        now = time.monotonic()
+        candidates = (self._expires_at > now) & (self._contexts == context_key)
+        if not candidates.any():
+            self.stats.misses += 1
+            return None
+
+        similarities = self._vectors @ vector
+        similarities[~candidates] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] < threshold:
+            self.stats.misses += 1
+            return None
+
+        self._last_used[best] = now
+        self.stats.hits += 1
+        return self._answers[best], float(similarities[best])
+
+    def add(self, vector: np.ndarray, context_key: str, answer: str) -> None:
+        if self._vectors is None or vector.shape[0] != self._vectors.shape[1]:
+            # First entry, or the embedding model changed: start over
+            self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            self._expires_at[:] = 0
+
+        now = time.monotonic()
+        free = np.flatnonzero(self._expires_at <= now)
+        if free.size:
+            slot = int(free[0])
+            if self._expires_at[slot]:
+                self.stats.expirations += 1
+        else:
+            slot = int(np.argmin(self._last_used))
+            self.stats.evictions += 1
+
+        self._vectors[slot] = vector
+        self._expires_at[slot] = now + self.ttl
+        self._last_used[slot] = now
+        self._contexts[slot] = context_key
+        self._answers[slot] = answer
+
+
+class SemanticCache:
+    """Embeds questions and keeps one VectorIndex per namespace."""
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_SIZE,
+        ttl: float = SEMANTIC_CACHE_TTL,
+        model: str = EMBEDDING_MODEL,
+        client: AsyncOpenAI | None = None,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.model = model
+        self.client = client or AsyncOpenAI(
+            api_key=EMBEDDING_API_KEY, base_url=EMBEDDING_BASE_URL
+        )
+        self._indexes: dict[str, VectorIndex] = {}
+
+    def index(self, namespace: str) -> VectorIndex:
+        if namespace not in self._indexes:
+            self._indexes[namespace] = VectorIndex(self.max_entries, self.ttl)
+        return self._indexes[namespace]
+
+    async def embed(self, text: str) -> np.ndarray | None:
+        """Unit-length embedding of `text`, or None if the endpoint failed."""
+        try:
+            response = await self.client.embeddings.create(
+                model=self.model, input=text, encoding_format="float"
+            )
+        except Exception as e:
+            print(f"[Semantic Cache] Embedding failed: {e}")
+            return None
+
+        vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def lookup(
+        self, namespace: str, vector: np.ndarray, context_key: str
+    ) -> tuple[str, float] | None:
+        """Return (answer, similarity) for a similar question, or None."""
+        return self.index(namespace).search(vector, context_key, self.threshold)
+
+    def add(self, namespace: str, vector: np.ndarray, context_key: str, answer: str) -> None:
+        if answer:
+            self.index(namespace).add(vector, context_key, answer)
+
+    def metrics(self) -> dict[str, float]:
+        samples = {}
+        for namespace, index in self._indexes.items():
+            label = f'{{namespace="{namespace}"}}'
+            samples[f"semantic_cache_hits_total{label}"] = index.stats.hits
+            samples[f"semantic_cache_misses_total{label}"] = index.stats.misses
+            samples[f"semantic_cache_evictions_total{label}"] = index.stats.evictions
+            samples[f"semantic_cache_expirations_total{label}"] = index.stats.expirations
+            samples[f"semantic_cache_entries{label}"] = len(index)
+        return samples
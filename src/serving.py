@@ -0,0 +1,106 @@
+"""
+Serving - run an agent's ASGI app in one or several processes
+
+`serve("agent_b_worker:create_app", port=8000, workers=4, create_app=create_app)`
+serves the agent's app. A single process serves the app built by the
+`create_app` passed in; importing the factory string instead would import
+the agent's module a second time when it runs as `__main__`, building all
+its module-level state (clients, caches, pools) twice. With more than one
+worker the process pre-forks N server processes that each bind the port
+with SO_REUSEPORT, so the kernel spreads connections over all of them and
+every core runs an event loop. Children are started as fresh interpreters
+and import the factory themselves; no sockets, threads or database
+handles are shared by fork.
+
+State that must be consistent across processes lives in SQLite files that
+all processes of an agent open (see the README): conversations and response
+cache invalidations (SHARED_STATE_DIR), answers (ANSWER_CACHE_DIR) and tasks
+(TASK_STORE=sqlite). Everything else is a per-process cache.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+from collections.abc import Callable
+
+import uvicorn
+
+HOST = os.getenv("HOST", "0.0.0.0")
+WORKERS = int(os.getenv("WORKERS", "1"))
+
+# Settings that let the processes of an agent share state
+SHARED_STATE_SETTINGS = ("SHARED_STATE_DIR", "ANSWER_CACHE_DIR", "TASK_STORE")
+
+
+def parse_workers(argv: list[str] | None = None) -> int:
+    """Read `--workers N` from the command line (default: WORKERS or 1)."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args, _ = parser.parse_known_args(argv)
+    return max(1, args.workers)
+
+
+def serve(
+    factory: str,
+    port: int,
+    workers: int = 1,
+    host: str = HOST,
+    create_app: Callable | None = None,
+) -> None:
+    """Serve the app returned by `factory` ("module:function") on `port`.
+
+    With one worker, `create_app` (if given) builds the app in this process.
+    """
+    if workers <= 1:
+        if create_app is not None:
+            uvicorn.run(create_app(), host=host, port=port)
+        else:
+            uvicorn.run(factory, factory=True, host=host, port=port)
+        return
+
+    unshared = [name for name in SHARED_STATE_SETTINGS if not os.getenv(name)]
+    if unshared:
+        print(f"[Serving] Not shared between workers (set {', '.join(unshared)} to share)")
+
+    if not hasattr(socket, "SO_REUSEPORT"):
+        # No SO_REUSEPORT (e.g. Windows): uvicorn shares one listening socket
+        uvicorn.run(factory, factory=True, host=host, port=port, workers=workers)
+        return
+
+    print(f"[Serving] Starting {workers} worker processes on port {port} (SO_REUSEPORT)")
+    children = [
+        subprocess.Popen([sys.executable, __file__, factory, host, str(port)])
+        for _ in range(workers)
+    ]
+
+    def stop(signum, frame):
+        for child in children:
+            if child.poll() is None:
+                child.send_signal(signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for child in children:
+        child.wait()
+
+
+def reuseport_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(factory: str, host: str, port: int) -> None:
+    """One pre-forked server process with its own SO_REUSEPORT socket."""
+    server = uvicorn.Server(uvicorn.Config(factory, factory=True))
+    server.run(sockets=[reuseport_socket(host, port)])
+
+
+if __name__ == "__main__":
+    run_worker(sys.argv[1], sys.argv[2], int(sys.argv[3]))
@@ -0,0 +1,138 @@
+"""
+Single Flight - share one streamed LLM call between identical concurrent requests
+
+The first request for a key (the leader) makes the call. Requests with the
+same key that arrive while it is running (followers) don't call upstream:
+they replay the chunks streamed so far and then receive the rest as the
+leader gets them, so every request still streams its own answer.
+
+The call runs in a task of its own, so cancelling one request (tasks/cancel)
+doesn't fail the others; the call is only cancelled, closing the LLM
+stream, once no request is waiting for it any more.
+"""
+
+import asyncio
+import os
+from collections import Counter
+from collections.abc import Awaitable, Callable
+
+SINGLE_FLIGHT = os.getenv("SINGLE_FLIGHT", "true").lower() in ("1", "true", "yes")
+
+_DONE = object()
+
+
+class _FlightCancelled(Exception):
+    """The shared call was cancelled, but not by this caller."""
+
+
+class _Flight:
+    def __init__(self):
+        self.chunks: list[str] = []
+        self.subscribers: list[asyncio.Queue] = []
+        self.task: asyncio.Task | None = None
+
+    def publish(self, item) -> None:
+        if item is not _DONE:
+            self.chunks.append(item)
+        for subscriber in self.subscribers:
+            subscriber.put_nowait(item)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one upstream call."""
+
+    def __init__(self, name: str = "", enabled: bool = SINGLE_FLIGHT):
+        self.name = name  # Labels the metrics, e.g. the expert
+        self.enabled = enabled
+        self.stats: Counter[str] = Counter()  # "upstream" calls made, "coalesced" calls saved
+        self._flights: dict[str, _Flight] = {}
+
+    async def run(
+        self,
+        key: str | None,
+        call: Callable[[Callable[[str], None]], Awaitable[str]],
+        on_delta: Callable[[str], None],
+    ) -> tuple[str, bool]:
+        """Run `call(on_delta)` or join the identical call already in flight.
+
+        `call` streams chunks through the callback it is given and returns the
+        full text; each caller's `on_delta` sees every chunk exactly once.
+        Returns the text and whether it came from another request's call.
+
+        A cancelled caller only stops waiting; the shared call is cancelled
+        when the last caller waiting for it is. A caller whose shared call was
+        cancelled by someone else, before it streamed anything to it, makes
+        a new call.
+        """
+        if not self.enabled or key is None:
+            self.stats["upstream"] += 1
+            return await call(on_delta), False
+
+        while True:
+            flight = self._flights.get(key)
+            shared = flight is not None
+            if shared:
+                self.stats["coalesced"] += 1
+            else:
+                flight = self._start(key, call)
+            try:
+                return await self._follow(key, flight, on_delta), shared
+            except _FlightCancelled:
+                # Cancelled by someone else before this caller saw any of it: call again
+                continue
+
+    def _start(self, key: str, call: Callable[[Callable[[str], None]], Awaitable[str]]) -> _Flight:
+        flight = _Flight()
+        self._flights[key] = flight
+        self.stats["upstream"] += 1
+        flight.task = asyncio.create_task(self._fly(key, flight, call))
+        # Mark an error as retrieved, so it isn't logged when nobody awaits it
+        flight.task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return flight
+
+    async def _fly(
+        self, key: str, flight: _Flight, call: Callable[[Callable[[str], None]], Awaitable[str]]
+    ) -> str:
+        try:
+            return await call(flight.publish)
+        finally:
+            self._forget(key, flight)
+            flight.publish(_DONE)
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def _follow(self, key: str, flight: _Flight, on_delta: Callable[[str], None]) -> str:
+        subscriber: asyncio.Queue = asyncio.Queue()
+        for chunk in flight.chunks:
+            subscriber.put_nowait(chunk)
+        flight.subscribers.append(subscriber)
+
+        delivered = False
+        try:
+            while (item := await subscriber.get()) is not _DONE:
+                on_delta(item)
+                delivered = True
+            # Waiting instead of awaiting the task: one caller giving up must
+            # not cancel the call for the others
+            await asyncio.wait({flight.task})
+        except asyncio.CancelledError:
+            flight.subscribers.remove(subscriber)
+            if not flight.subscribers and not flight.task.done():
+                # New requests for the key must not join a call being cancelled
+                self._forget(key, flight)
+                flight.task.cancel()
+            raise
+
+        if flight.task.cancelled() and not delivered:
+            raise _FlightCancelled
+        return flight.task.result()
+
+    def metrics(self) -> dict[str, float]:
+        label = f'{{expert="{self.name}"}}' if self.name else ""
+        return {
+            f"single_flight_upstream_calls_total{label}": self.stats["upstream"],
+            f"single_flight_coalesced_calls_total{label}": self.stats["coalesced"],
+            f"single_flight_in_flight{label}": len(self._flights),
+        }
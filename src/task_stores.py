@@ -0,0 +1,369 @@
+"""
+Task Stores - bounded replacements for the SDK's InMemoryTaskStore
+
+InMemoryTaskStore keeps every task, with its full message history and
+artifact text, for the lifetime of the process. BoundedTaskStore keeps the
+same semantics for live tasks but limits the total number and size of
+stored tasks:
+
+- tasks in a terminal state (completed, canceled, failed, rejected) expire
+  `terminal_ttl` seconds after they finished
+- tasks that never reach a terminal state (e.g. an executor that died
+  without a final status) expire `stale_ttl` seconds after their last save
+- above `max_tasks` or `max_bytes` the least recently used terminal tasks
+  are evicted; running tasks are never evicted, since the request handler
+  still needs them (the limits are exceeded until they finish)
+
+SQLiteTaskStore adds durability: tasks survive a restart and can still be
+fetched with `tasks/get` after a client reconnects. `build_task_store` picks
+the implementation from the TASK_STORE environment variable.
+"""
+
+import asyncio
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import TaskStore
+from a2a.types import Message, Part, Task, TaskState
+
+TASK_STORE_MAX_TASKS = int(os.getenv("TASK_STORE_MAX_TASKS", "10000"))
+TASK_STORE_MAX_BYTES = int(os.getenv("TASK_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+TASK_STORE_TERMINAL_TTL = float(os.getenv("TASK_STORE_TERMINAL_TTL", "3600"))
+# Unfinished tasks not saved for this long are considered abandoned
+TASK_STORE_STALE_TTL = float(os.getenv("TASK_STORE_STALE_TTL", "1800"))
+
+# "memory" (BoundedTaskStore) or "sqlite" (SQLiteTaskStore)
+TASK_STORE = os.getenv("TASK_STORE", "memory").lower()
+TASK_STORE_DIR = os.getenv("TASK_STORE_DIR", "data")
+# Tasks are kept in the database this long after their last update
+TASK_DB_RETENTION = float(os.getenv("TASK_DB_RETENTION", str(7 * 24 * 3600)))
+# Saves are collected this long and then written in one transaction
+TASK_DB_FLUSH_INTERVAL = float(os.getenv("TASK_DB_FLUSH_INTERVAL", "0.2"))
+TASK_DB_COMPACT_INTERVAL = 600
+
+TERMINAL_STATES = {
+    TaskState.completed,
+    TaskState.canceled,
+    TaskState.failed,
+    TaskState.rejected,
+}
+
+TASK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    context_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_updated_at ON tasks (updated_at);
+"""
+
+# Rough overhead of a task, message or part on top of its text
+TASK_OVERHEAD_BYTES = 512
+PART_OVERHEAD_BYTES = 64
+
+
+def part_size(part: Part) -> int:
+    root = part.root
+    if hasattr(root, "text"):
+        return len(root.text) + PART_OVERHEAD_BYTES
+    if hasattr(root, "data"):
+        return len(repr(root.data)) + PART_OVERHEAD_BYTES
+    return PART_OVERHEAD_BYTES
+
+
+def messages_size(messages: list[Message]) -> int:
+    return sum(
+        PART_OVERHEAD_BYTES + sum(part_size(part) for part in message.parts)
+        for message in messages
+    )
+
+
+def is_terminal(task: Task) -> bool:
+    return task.status.state in TERMINAL_STATES
+
+
+@dataclass
+class _StoredTask:
+    task: Task
+    size: int
+    history_len: int  # History is append-only; its size is only recomputed when it grows
+    history_size: int
+    # Artifact id -> (its parts list, parts counted, their size). Streamed
+    # chunks are appended to the same list, so only new parts are measured
+    artifact_sizes: dict[str, tuple[list[Part], int, int]]
+
+
+class BoundedTaskStore(TaskStore):
+    """In-memory TaskStore bounded by task count, bytes and TTLs for finished and idle tasks.
+
+    All operations are synchronous inside, so no lock is needed on the event loop.
+    """
+
+    def __init__(
+        self,
+        max_tasks: int = TASK_STORE_MAX_TASKS,
+        max_bytes: int = TASK_STORE_MAX_BYTES,
+        terminal_ttl: float = TASK_STORE_TERMINAL_TTL,
+        stale_ttl: float = TASK_STORE_STALE_TTL,
+    ):
+        self.max_tasks = max_tasks
+        self.max_bytes = max_bytes
+        self.terminal_ttl = terminal_ttl
+        self.stale_ttl = stale_ttl
+        self.total_bytes = 0
+        # "expired", "stale" and "evicted" tasks, and saves that left running
+        # tasks over the limit
+        self.evictions: Counter[str] = Counter()
+        self._tasks: OrderedDict[str, _StoredTask] = OrderedDict()
+        # Finished task id -> expiry time, in the order the tasks finished
+        self._expiry: OrderedDict[str, float] = OrderedDict()
+        # Unfinished task id -> time of its last save, oldest first
+        self._updated_at: OrderedDict[str, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        self.put(task)
+
+    async def get(
+        self, task_id: str, context: ServerCallContext | None = None
+    ) -> Task | None:
+        self._expire()
+        stored = self._tasks.get(task_id)
+        if stored is None:
+            return None
+        self._tasks.move_to_end(task_id)
+        return stored.task
+
+    async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+        self._remove(task_id)
+
+    def put(self, task: Task) -> None:
+        """Store a task synchronously and enforce the limits."""
+        previous = self._remove(task.id)
+        history = task.history or []
+        if previous is not None and previous.history_len == len(history):
+            history_size = previous.history_size
+        else:
+            history_size = messages_size(history)
+        artifact_sizes = {}
+        for artifact in task.artifacts or []:
+            parts = artifact.parts
+            counted, parts_size = 0, 0
+            if previous is not None and artifact.artifact_id in previous.artifact_sizes:
+                known_parts, known_count, known_size = previous.artifact_sizes[artifact.artifact_id]
+                if known_parts is parts and known_count <= len(parts):
+                    counted, parts_size = known_count, known_size
+            parts_size += sum(part_size(part) for part in parts[counted:])
+            artifact_sizes[artifact.artifact_id] = (parts, len(parts), parts_size)
+        size = TASK_OVERHEAD_BYTES + history_size + sum(
+            PART_OVERHEAD_BYTES + parts_size for _, _, parts_size in artifact_sizes.values()
+        )
+
+        self._tasks[task.id] = _StoredTask(
+            task, size, len(history), history_size, artifact_sizes
+        )
+        self.total_bytes += size
+        if is_terminal(task):
+            self._expiry[task.id] = time.monotonic() + self.terminal_ttl
+        else:
+            self._updated_at[task.id] = time.monotonic()
+
+        self._expire()
+        self._enforce_limits(keep=task.id)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        while self._expiry:
+            task_id, expires_at = next(iter(self._expiry.items()))
+            if expires_at > now:
+                break
+            self._remove(task_id)
+            self.evictions["expired"] += 1
+        while self._updated_at:
+            task_id, updated_at = next(iter(self._updated_at.items()))
+            if updated_at + self.stale_ttl > now:
+                break
+            print(f"[Task Store] Dropping task {task_id}, not updated for {self.stale_ttl:.0f}s")
+            self._remove(task_id)
+            self.evictions["stale"] += 1
+
+    def _enforce_limits(self, keep: str) -> None:
+        def over_limit() -> bool:
+            return len(self._tasks) > self.max_tasks or self.total_bytes > self.max_bytes
+
+        while over_limit():
+            # Least recently used finished task first; usually the oldest entry
+            victim = next(
+                (tid for tid in self._tasks if tid in self._expiry and tid != keep), None
+            )
+            if victim is None:
+                # Only running tasks left; they stay until they finish
+                self.evictions["over_limit_running"] += 1
+                return
+            self._remove(victim)
+            self.evictions["evicted"] += 1
+
+    def _remove(self, task_id: str) -> _StoredTask | None:
+        stored = self._tasks.pop(task_id, None)
+        self._expiry.pop(task_id, None)
+        self._updated_at.pop(task_id, None)
+        if stored is not None:
+            self.total_bytes -= stored.size
+        return stored
+
+    def metrics(self) -> dict[str, float]:
+        samples = {
+            "task_store_tasks": len(self._tasks),
+            "task_store_running_tasks": len(self._updated_at),
+            "task_store_bytes": self.total_bytes,
+            "task_store_max_bytes": self.max_bytes,
+        }
+        for reason in ("expired", "stale", "evicted", "over_limit_running"):
+            samples[f'task_store_evictions_total{{reason="{reason}"}}'] = self.evictions[reason]
+        return samples
+
+
+class SQLiteTaskStore(TaskStore):
+    """Durable TaskStore: SQLite in WAL mode behind an in-memory hot tier.
+
+    Saves only mark a task dirty. A background flush serializes the latest
+    version of each dirty task (a streamed answer saved once per chunk is
+    written once per flush) and commits the batch from a worker thread.
+    Reads are served from the hot tier and fall back to the database, e.g.
+    for `tasks/get` after a restart.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        retention: float = TASK_DB_RETENTION,
+        flush_interval: float = TASK_DB_FLUSH_INTERVAL,
+        hot_tier: BoundedTaskStore | None = None,
+    ):
+        self.path = path
+        self.retention = retention
+        self.flush_interval = flush_interval
+        self.hot = hot_tier or BoundedTaskStore()
+        self.stats: Counter[str] = Counter()  # "batches", "rows_written", "db_reads"
+        self._dirty: dict[str, Task] = {}
+        self._deleted: set[str] = set()
+        self._flusher: asyncio.Task | None = None
+        self._last_compaction = 0.0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(TASK_SCHEMA)
+        self._db_lock = threading.Lock()
+        atexit.register(self.flush_now)
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        self.hot.put(task)
+        self._dirty[task.id] = task
+        self._deleted.discard(task.id)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    async def get(
+        self, task_id: str, context: ServerCallContext | None = None
+    ) -> Task | None:
+        task = await self.hot.get(task_id)
+        if task is not None or task_id in self._deleted:
+            return task
+
+        self.stats["db_reads"] += 1
+        body = await asyncio.to_thread(self._read, task_id)
+        if body is None:
+            return None
+        task = Task.model_validate_json(body)
+        self.hot.put(task)
+        return task
+
+    async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+        await self.hot.delete(task_id)
+        self._dirty.pop(task_id, None)
+        self._deleted.add(task_id)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        """Collect saves for one interval, then write them in one transaction."""
+        while self._dirty or self._deleted:
+            await asyncio.sleep(self.flush_interval)
+            rows, deleted = self._take_batch()
+            try:
+                await asyncio.to_thread(self._write, rows, deleted)
+            except sqlite3.Error as e:
+                print(f"[Task Store] Writing {len(rows)} tasks to {self.path} failed: {e}")
+
+    def _take_batch(self) -> tuple[list[tuple], list[str]]:
+        now = time.time()
+        rows = [
+            (task.id, task.context_id, task.status.state.value, now, task.model_dump_json())
+            for task in self._dirty.values()
+        ]
+        deleted = list(self._deleted)
+        self._dirty.clear()
+        self._deleted.clear()
+        return rows, deleted
+
+    def _write(self, rows: list[tuple], deleted: list[str]) -> None:
+        with self._db_lock, self._conn:
+            if rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?)", rows
+                )
+            if deleted:
+                self._conn.executemany(
+                    "DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in deleted]
+                )
+            if time.time() - self._last_compaction > TASK_DB_COMPACT_INTERVAL:
+                # Unfinished tasks this old were abandoned (e.g. by a restart)
+                self._conn.execute(
+                    "DELETE FROM tasks WHERE updated_at < ?", (time.time() - self.retention,)
+                )
+                self._last_compaction = time.time()
+        self.stats["batches"] += 1
+        self.stats["rows_written"] += len(rows)
+
+    def _read(self, task_id: str) -> str | None:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT body FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def flush_now(self) -> None:
+        """Write all pending saves synchronously (used at exit)."""
+        rows, deleted = self._take_batch()
+        if rows or deleted:
+            self._write(rows, deleted)
+
+    def metrics(self) -> dict[str, float]:
+        return {
+            **self.hot.metrics(),
+            "task_store_pending_writes": len(self._dirty),
+            "task_store_db_batches_total": self.stats["batches"],
+            "task_store_db_rows_written_total": self.stats["rows_written"],
+            "task_store_db_reads_total": self.stats["db_reads"],
+        }
+
+
+def build_task_store(name: str) -> BoundedTaskStore | SQLiteTaskStore:
+    """The task store selected by TASK_STORE ("memory" or "sqlite") for an agent."""
+    if TASK_STORE == "sqlite":
+        path = os.path.join(TASK_STORE_DIR, f"{name}_tasks.sqlite")
+        print(f"[Task Store] Persisting tasks to {path}")
+        return SQLiteTaskStore(path)
+    return BoundedTaskStore()
@@ -6,97 +6,184 @@ Agent A (Manager) via the A2A protocol, demonstrating frontend/backend separatio
 
 Usage:
     python terminal_client.py
+    python terminal_client.py --bulk questions.jsonl --output results.jsonl
+
+The --bulk mode answers a JSONL file of questions concurrently (see
+bulk_runner.py); `-` reads from stdin and writes to stdout.
 
 Make sure Agent A is running in server mode first:
     python agent_a_manager.py --server
 """
 
+import argparse
 import asyncio
-import json
-
-import httpx
-from a2a.client import ClientFactory
-from a2a.client.client import ClientConfig
-from a2a.types import Message, Role, TextPart
+import functools
+import sys
+from collections.abc import Callable
+from contextlib import nullcontext, redirect_stdout
 from uuid import uuid4
 
+from a2a.client import Client
+from a2a.client.errors import A2AClientJSONRPCError
+from a2a.types import Message, Role, TaskArtifactUpdateEvent
+
+from admission import overload_retry_after
+from artifact_stream import artifact_text
+from bulk_runner import DEFAULT_CONCURRENCY, DEFAULT_RETRIES, BulkRunner, print_summary
+from client_pool import A2AClientPool
+from protocol import question_part, raise_for_failed_task
+
 # Agent A Manager URL
 AGENT_A_URL = "http://localhost:8002"
 
-# HTTP client with longer timeout for LLM responses
-HTTP_TIMEOUT = httpx.Timeout(timeout=120.0)  # 2 minutes
+# Pooled connection to Agent A; its agent card is cached and revalidated
+agent_clients = A2AClientPool([AGENT_A_URL])
 
 # Session ID for conversation continuity
 SESSION_ID = uuid4().hex
 
 
-def format_message_with_history(
-    question: str, conversation_history: list[dict]
+async def send_question(
+    question: str,
+    conversation_history: list[dict] | None = None,
+    on_delta: Callable[[str], None] | None = None,
+    context_id: str | None = None,
+    on_metadata: Callable[[dict], None] | None = None,
 ) -> str:
-    """Format the current question with conversation history as JSON context."""
-    payload = {
-        "current_question": question,
-        "conversation_history": conversation_history,
-    }
-    return json.dumps(payload)
-
-
-def extract_assistant_response(response_text: str) -> str:
-    """Extract just the assistant response, stripping the formatted header."""
-    # The response contains a formatted box, extract the actual content
-    lines = response_text.strip().split("\n")
-    # Find content after the box header
-    content_lines = []
-    in_content = False
-    for line in lines:
-        if line.startswith("╚"):
-            in_content = True
-            continue
-        if in_content and not line.startswith("───"):
-            content_lines.append(line)
-    return "\n".join(content_lines).strip() if content_lines else response_text
+    """Send a question to Agent A via A2A and return the response.
 
+    Agent A keeps the conversation history per context_id, so normally only
+    the question is sent. Passing `conversation_history` sends the full
+    history instead, as older clients did.
 
-async def send_question(question: str, conversation_history: list[dict]) -> str:
-    """Send a question to Agent A via A2A and return the response."""
-    httpx_client = httpx.AsyncClient(timeout=HTTP_TIMEOUT)
-    config = ClientConfig(httpx_client=httpx_client)
-
+    Streamed chunks of the response are passed to `on_delta` as they arrive.
+    Response metadata, e.g. whether Agent A answered from its cache, is passed
+    to `on_metadata`.
+    """
     try:
-        a2a_client = await ClientFactory.connect(AGENT_A_URL, client_config=config)
+        a2a_client = await agent_clients.get(AGENT_A_URL)
     except Exception as e:
         return f"Error connecting to Agent A: {e}\nMake sure agent_a_manager.py is running with --server flag."
 
-    # Include conversation history in the message
-    message_text = format_message_with_history(question, conversation_history)
+    streamed: list[str] = []
+    response_text = "No response received."
+
+    def collect(text: str) -> None:
+        streamed.append(text)
+        if on_delta:
+            on_delta(text)
 
+    try:
+        # Agent A keeps history per session
+        return await stream_answer(
+            a2a_client,
+            question,
+            conversation_history,
+            context_id or SESSION_ID,
+            collect,
+            on_metadata,
+        )
+    except Exception as e:
+        retry_after = (
+            overload_retry_after(e.error) if isinstance(e, A2AClientJSONRPCError) else None
+        )
+        if retry_after is not None:
+            response_text = f"Agent A is busy right now, please retry in {retry_after}s."
+        else:
+            response_text = f"Error during communication: {e}"
+        if streamed:
+            # Keep the part of the response that arrived before the error
+            streamed.append(f"\n{response_text}")
+        if on_delta:
+            on_delta(response_text)
+
+    return "".join(streamed) if streamed else response_text
+
+
+async def stream_answer(
+    a2a_client: Client,
+    question: str,
+    conversation_history: list[dict] | None,
+    context_id: str,
+    on_delta: Callable[[str], None] | None = None,
+    on_metadata: Callable[[dict], None] | None = None,
+) -> str:
+    """Ask Agent A one question and return its answer; errors are raised."""
     message = Message(
         message_id=uuid4().hex,
-        context_id=SESSION_ID,  # Use consistent session ID for conversation
+        context_id=context_id,
         role=Role.user,
-        parts=[TextPart(type="text", text=message_text)],
+        parts=[question_part(question, conversation_history)],
     )
 
+    streamed: list[str] = []
     response_text = "No response received."
-    try:
-        async for event in a2a_client.send_message(message):
-            if isinstance(event, tuple):
-                task, update = event
-                if task.artifacts:
-                    artifact = task.artifacts[0]
-                    if artifact.parts:
-                        part = artifact.parts[0].root
-                        if hasattr(part, "text"):
-                            response_text = part.text
-    except Exception as e:
-        response_text = f"Error during communication: {e}"
-    finally:
-        await a2a_client.close()
-
+    async for event in a2a_client.send_message(message):
+        if isinstance(event, tuple):
+            task, update = event
+            raise_for_failed_task(task)
+            if isinstance(update, TaskArtifactUpdateEvent):
+                if update.artifact.metadata and on_metadata:
+                    on_metadata(update.artifact.metadata)
+                chunk = artifact_text(update.artifact)
+                if chunk:
+                    streamed.append(chunk)
+                    if on_delta:
+                        on_delta(chunk)
+            elif task.artifacts:
+                # Status updates carry the chunks aggregated so far; only a
+                # non-streaming answer is taken from them
+                response_text = artifact_text(task.artifacts[0])
+
+    if streamed:
+        return "".join(streamed)
+    if on_delta:
+        on_delta(response_text)
     return response_text
 
 
+def show_cache_status(metadata: dict) -> None:
+    if metadata.get("cached"):
+        print(
+            f"[Cached answer from Agent A, {metadata.get('cache_age_seconds', 0):.0f}s old]"
+        )
+
+
 async def main():
+    parser = argparse.ArgumentParser(description="Terminal client for Agent A")
+    parser.add_argument("--bulk", metavar="FILE", help="answer a JSONL file of questions ('-' for stdin)")
+    parser.add_argument("--output", "-o", default="-", help="bulk results JSONL ('-' for stdout)")
+    parser.add_argument("--concurrency", "-c", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="retries of overloaded requests")
+    args = parser.parse_args()
+
+    if not args.bulk:
+        async with agent_clients:
+            await chat_loop()
+        return
+
+    stdout = sys.stdout
+    # Log output goes to stderr, so stdout only carries the results
+    with redirect_stdout(sys.stderr):
+        async with agent_clients:
+            await bulk_mode(args, stdout)
+
+
+async def bulk_mode(args: argparse.Namespace, stdout) -> None:
+    source = nullcontext(sys.stdin) if args.bulk == "-" else open(args.bulk, encoding="utf-8")
+    output = nullcontext(stdout) if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    with source as questions, output as results:
+        a2a_client = await agent_clients.get(AGENT_A_URL)
+        runner = BulkRunner(
+            functools.partial(stream_answer, a2a_client),
+            results,
+            concurrency=args.concurrency,
+            retries=args.retries,
+        )
+        print_summary(await runner.run(questions))
+
+
+async def chat_loop():
     print("=" * 70)
     print("  TERMINAL CLIENT - A2A Frontend")
     print("  Communicates with Agent A (Manager) via A2A protocol")
@@ -105,13 +192,13 @@ async def main():
     print("  - This client = Frontend (user interface)")
     print("  - Agent A     = Backend (routes to expert agents)")
     print("-" * 70)
-    print("  Conversation history is maintained across messages.")
+    print("  Conversation history is maintained by Agent A for this session.")
     print("  Type 'clear' to start a new conversation.")
     print("  Type 'quit' or 'exit' to stop.")
     print("=" * 70)
 
-    # Conversation history maintained by the client
-    conversation_history: list[dict] = []
+    # Agent A keeps the history for this session; a new session starts fresh
+    session_id = SESSION_ID
 
     while True:
         try:
@@ -128,18 +215,18 @@ async def main():
             break
 
         if question.lower() == "clear":
-            conversation_history.clear()
+            session_id = uuid4().hex
             print("[Conversation history cleared]")
             continue
 
         print("\n[Sending to Agent A via A2A...]")
-        response = await send_question(question, conversation_history)
-        print(response)
-
-        # Add this exchange to conversation history
-        assistant_content = extract_assistant_response(response)
-        conversation_history.append({"role": "user", "content": question})
-        conversation_history.append({"role": "assistant", "content": assistant_content})
+        await send_question(
+            question,
+            on_delta=lambda text: print(text, end="", flush=True),
+            context_id=session_id,
+            on_metadata=show_cache_status,
+        )
+        print()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+"""
+LRU + TTL Cache - small in-process cache with hit/miss accounting
+
+Entries expire after a TTL and the least recently used entries are evicted
+once the cache exceeds its entry or byte limit. Used for routing decisions,
+answers and other per-process state that is cheap to recompute but not free.
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    # Values rejected by set() for being larger than max_bytes
+    oversized: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUTTLCache:
+    """Least-recently-used cache whose entries also expire after `ttl` seconds.
+
+    With `sliding=True` every hit restarts the entry's TTL, which turns the TTL
+    into an idle timeout. When `max_bytes` is set, `sizeof` is used to measure
+    each value and the cache evicts until the total fits.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float | None = None,
+        max_bytes: int | None = None,
+        sizeof: Callable[[Any], int] | None = None,
+        sliding: bool = False,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.sliding = sliding
+        self.stats = CacheStats()
+        self.total_bytes = 0
+        # key -> (value, expires_at, size)
+        self._entries: OrderedDict[Hashable, tuple[Any, float, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live value and mark it as recently used, or `default`."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return default
+
+        value, expires_at, size = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            self._remove(key)
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return default
+
+        if self.sliding and self.ttl is not None:
+            self._entries[key] = (value, now + self.ttl, size)
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """Insert or replace a value, evicting old entries to stay within limits.
+
+        `ttl` overrides the cache's TTL for this entry. A value larger than
+        `max_bytes` is not cached, and any existing entry for the key is removed.
+        """
+        if key in self._entries:
+            self._remove(key)
+
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Never fits; caching it would just flush everything else. The old
+            # entry for the key is gone too, so a get() can't return a stale value
+            self.stats.oversized += 1
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else float("inf")
+        self._entries[key] = (value, expires_at, size)
+        self.total_bytes += size
+
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self.total_bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a key and return its value, or `default` if absent."""
+        if key not in self._entries:
+            return default
+        return self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def keys(self) -> list[Hashable]:
+        return list(self._entries)
+
+    def items(self) -> list[tuple[Hashable, Any]]:
+        """Live (key, value) pairs, without touching recency or stats."""
+        now = time.monotonic()
+        return [(key, entry[0]) for key, entry in self._entries.items() if entry[1] > now]
+
+    def purge_expired(self) -> int:
+        """Drop all expired entries and return how many were removed."""
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry[1] <= now]
+        for key in expired:
+            self._remove(key)
+        self.stats.expirations += len(expired)
+        return len(expired)
+
+    def _remove(self, key: Hashable) -> Any:
+        value, _, size = self._entries.pop(key)
+        self.total_bytes -= size
+        return value
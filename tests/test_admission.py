@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+from a2a.utils.errors import ServerError
+
+from admission import OVERLOADED_ERROR_CODE, AdmissionController, overload_retry_after
+
+
+async def hold(admission, name, order, release):
+    async with admission.admit():
+        order.append(name)
+        await release.wait()
+
+
+def test_waiters_are_admitted_in_arrival_order():
+    async def scenario():
+        admission = AdmissionController("test", max_concurrent=1, max_queue=10, queue_timeout=5)
+        order = []
+        release = asyncio.Event()
+        release.set()
+        holder_release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "holder", order, holder_release))
+        await asyncio.sleep(0)
+
+        waiters = []
+        for name in ("first", "second", "third"):
+            waiters.append(asyncio.create_task(hold(admission, name, order, release)))
+            await asyncio.sleep(0)
+        assert admission.queue_depth == 3
+
+        holder_release.set()
+        await asyncio.gather(holder, *waiters)
+
+        assert order == ["holder", "first", "second", "third"]
+        assert admission.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_freed_slot_goes_to_the_queue_not_a_newcomer():
+    async def scenario():
+        admission = AdmissionController("test", max_concurrent=1, max_queue=10, queue_timeout=5)
+        order = []
+        release = asyncio.Event()
+        release.set()
+        holder_release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "holder", order, holder_release))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold(admission, "queued", order, release))
+        await asyncio.sleep(0)
+
+        holder_release.set()
+        await holder
+        # The slot was handed to the waiter before it got to run
+        assert admission.active == 1
+        newcomer = asyncio.create_task(hold(admission, "newcomer", order, release))
+        await asyncio.gather(queued, newcomer)
+
+        assert order == ["holder", "queued", "newcomer"]
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        admission = AdmissionController("test", max_concurrent=1, max_queue=10, queue_timeout=5)
+        order = []
+        release = asyncio.Event()
+        release.set()
+        holder_release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "holder", order, holder_release))
+        await asyncio.sleep(0)
+        gone = asyncio.create_task(hold(admission, "gone", order, release))
+        await asyncio.sleep(0)
+        kept = asyncio.create_task(hold(admission, "kept", order, release))
+        await asyncio.sleep(0)
+
+        gone.cancel()
+        await asyncio.gather(gone, return_exceptions=True)
+        assert admission.queue_depth == 1
+        holder_release.set()
+        await asyncio.gather(holder, kept)
+
+        assert order == ["holder", "kept"]
+        assert admission.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_with_retryable_error():
+    async def scenario():
+        admission = AdmissionController("test", max_concurrent=1, max_queue=1, queue_timeout=5)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "holder", [], release))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold(admission, "queued", [], release))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ServerError) as rejected:
+            async with admission.admit():
+                pass
+
+        assert rejected.value.error.code == OVERLOADED_ERROR_CODE
+        assert overload_retry_after(rejected.value.error) >= 1
+        assert admission.stats["rejected_queue_full"] == 1
+        release.set()
+        await asyncio.gather(holder, queued)
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_rejects():
+    async def scenario():
+        admission = AdmissionController("test", max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "holder", [], release))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ServerError):
+            async with admission.admit():
+                pass
+
+        assert admission.stats["rejected_timeout"] == 1
+        assert admission.queue_depth == 0
+        release.set()
+        await holder
+
+    asyncio.run(scenario())
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from rate_limiter import RateLimiter, parse_limits, prompt_tokens
+
+MODEL = "test-model"
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def test_parse_limits():
+    assert parse_limits("gpt-4=500:30000, gpt-4o-mini=5000:") == {
+        "gpt-4": (500.0, 30000.0),
+        "gpt-4o-mini": (5000.0, 0.0),
+    }
+
+
+def test_unlimited_model_does_not_wait():
+    async def scenario():
+        limiter = RateLimiter(limits={})
+        async with limiter.reserve(MODEL, MESSAGES, 100) as reservation:
+            reservation.settle(SimpleNamespace(total_tokens=10))
+
+        assert limiter.stats[MODEL]["requests"] == 1
+        assert limiter.stats[MODEL]["actual_tokens"] == 10
+        assert limiter.stats[MODEL]["waited"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_unused_tokens_are_refunded_and_wake_the_queue():
+    async def scenario():
+        estimate = prompt_tokens(MESSAGES, MODEL) + 500
+        # Room for one call; refilling enough for a second would take about 50s
+        limiter = RateLimiter(limits={MODEL: (0, estimate + 50)})
+        first_reserved = asyncio.Event()
+        finish_first = asyncio.Event()
+
+        async def first():
+            async with limiter.reserve(MODEL, MESSAGES, 500) as reservation:
+                first_reserved.set()
+                await finish_first.wait()
+                reservation.settle(SimpleNamespace(total_tokens=20))
+
+        async def second():
+            async with limiter.reserve(MODEL, MESSAGES, 500):
+                pass
+
+        first_task = asyncio.create_task(first())
+        await first_reserved.wait()
+        second_task = asyncio.create_task(second())
+        await asyncio.sleep(0.05)
+        assert limiter.queued(MODEL) == 1
+
+        started = time.monotonic()
+        finish_first.set()
+        await asyncio.wait_for(asyncio.gather(first_task, second_task), 2)
+
+        assert time.monotonic() - started < 1
+        assert limiter.stats[MODEL]["waited"] == 1
+        assert limiter.queued(MODEL) == 0
+
+    asyncio.run(scenario())
+
+
+def test_usage_above_the_estimate_is_taken_as_debt():
+    async def scenario():
+        limiter = RateLimiter(limits={MODEL: (0, 10_000)})
+        async with limiter.reserve(MODEL, MESSAGES, 100) as reservation:
+            reservation.settle(SimpleNamespace(total_tokens=5_000))
+
+        assert limiter.metrics()[f'llm_rate_limit_tokens_available{{model="{MODEL}"}}'] < 5_001
+
+    asyncio.run(scenario())
+
+
+def test_waiting_calls_are_served_in_arrival_order():
+    async def scenario():
+        # 100 tokens per second, starting empty
+        limiter = RateLimiter(limits={MODEL: (0, 6_000)})
+        limiter._budget(MODEL).tokens.level = 0
+        order = []
+
+        async def call(name, max_tokens):
+            async with limiter.reserve(MODEL, MESSAGES, max_tokens):
+                order.append(name)
+
+        # A big call at the head of the queue is not overtaken by smaller ones
+        tasks = []
+        for name, max_tokens in (("big", 30), ("small", 0), ("smaller", 0)):
+            tasks.append(asyncio.create_task(call(name, max_tokens)))
+            await asyncio.sleep(0)
+        assert limiter.queued(MODEL) == 3
+        await asyncio.wait_for(asyncio.gather(*tasks), 5)
+
+        assert order == ["big", "small", "smaller"]
+
+    asyncio.run(scenario())
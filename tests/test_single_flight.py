@@ -0,0 +1,155 @@
+import asyncio
+
+from single_flight import SingleFlight
+
+
+class Upstream:
+    """A streamed call that sends its chunks when the test releases them."""
+
+    def __init__(self, chunks=("a", "b")):
+        self.chunks = chunks
+        self.calls = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, on_delta):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        for chunk in self.chunks:
+            on_delta(chunk)
+        return "".join(self.chunks)
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flights = SingleFlight()
+        upstream = Upstream()
+        seen = {"leader": [], "follower": []}
+        leader = asyncio.create_task(flights.run("k", upstream, seen["leader"].append))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.run("k", upstream, seen["follower"].append))
+        await asyncio.sleep(0)
+        upstream.release.set()
+
+        assert await leader == ("ab", False)
+        assert await follower == ("ab", True)
+        assert seen == {"leader": ["a", "b"], "follower": ["a", "b"]}
+        assert upstream.calls == 1
+        assert flights.stats == {"upstream": 1, "coalesced": 1}
+
+    asyncio.run(scenario())
+
+
+def test_follower_replays_chunks_streamed_before_it_joined():
+    async def scenario():
+        flights = SingleFlight()
+        gate = asyncio.Event()
+
+        async def call(on_delta):
+            on_delta("a")
+            await gate.wait()
+            on_delta("b")
+            return "ab"
+
+        leader = asyncio.create_task(flights.run("k", call, lambda chunk: None))
+        await asyncio.sleep(0.01)
+        seen = []
+        follower = asyncio.create_task(flights.run("k", call, seen.append))
+        await asyncio.sleep(0)
+        gate.set()
+
+        await leader
+        assert await follower == ("ab", True)
+        assert seen == ["a", "b"]
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_the_leader_keeps_the_call_for_followers():
+    async def scenario():
+        flights = SingleFlight()
+        upstream = Upstream()
+        leader = asyncio.create_task(flights.run("k", upstream, lambda chunk: None))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.run("k", upstream, lambda chunk: None))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        upstream.release.set()
+
+        assert await follower == ("ab", True)
+        assert leader.cancelled()
+        assert upstream.calls == 1
+        assert upstream.cancelled == 0
+
+    asyncio.run(scenario())
+
+
+def test_last_caller_cancelling_cancels_the_call():
+    async def scenario():
+        flights = SingleFlight()
+        upstream = Upstream()
+        callers = [
+            asyncio.create_task(flights.run("k", upstream, lambda chunk: None))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert upstream.cancelled == 1
+        assert flights.metrics()["single_flight_in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_subscriber_retries_when_the_shared_call_is_cancelled_by_someone_else():
+    async def scenario():
+        flights = SingleFlight()
+        upstream = Upstream()
+        seen = []
+        leader = asyncio.create_task(flights.run("k", upstream, lambda chunk: None))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.run("k", upstream, seen.append))
+        await asyncio.sleep(0)
+
+        # Cancelled from outside before it streamed anything (e.g. at shutdown)
+        flights._flights["k"].task.cancel()
+        await asyncio.sleep(0.01)
+        upstream.release.set()
+
+        assert (await leader)[0] == "ab"
+        assert (await follower)[0] == "ab"
+        assert seen == ["a", "b"]
+        assert upstream.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_caller():
+    async def scenario():
+        flights = SingleFlight()
+        gate = asyncio.Event()
+
+        async def failing(on_delta):
+            await gate.wait()
+            raise RuntimeError("upstream failed")
+
+        callers = [
+            asyncio.create_task(flights.run("k", failing, lambda chunk: None))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+
+        assert [str(result) for result in results] == ["upstream failed"] * 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+from a2a.types import (
+    Artifact,
+    Message,
+    Part,
+    Role,
+    Task,
+    TaskState,
+    TaskStatus,
+    TextPart,
+)
+
+import task_stores
+from task_stores import BoundedTaskStore
+
+
+def text_part(text: str) -> Part:
+    return Part(root=TextPart(text=text))
+
+
+def make_task(task_id: str, state: TaskState = TaskState.working, chunks=()) -> Task:
+    return Task(
+        id=task_id,
+        context_id="ctx",
+        status=TaskStatus(state=state),
+        history=[Message(message_id=f"{task_id}-q", role=Role.user, parts=[text_part("question")])],
+        artifacts=[Artifact(artifact_id="answer", parts=[text_part(chunk) for chunk in chunks])],
+    )
+
+
+def finish(task: Task) -> Task:
+    task.status = TaskStatus(state=TaskState.completed)
+    return task
+
+
+def test_streamed_parts_are_measured_once(monkeypatch):
+    measured = []
+    part_size = task_stores.part_size
+    monkeypatch.setattr(
+        task_stores, "part_size", lambda part: measured.append(part) or part_size(part)
+    )
+    store = BoundedTaskStore()
+    task = make_task("t1", chunks=["a" * 100])
+    store.put(task)
+    for _ in range(5):
+        task.artifacts[0].parts.append(text_part("b" * 100))
+        store.put(task)
+
+    # Each chunk once, plus the question in the history when it was first seen
+    assert len(measured) == 6 + 1
+    fresh = BoundedTaskStore()
+    fresh.put(task)
+    assert store.total_bytes == fresh.total_bytes
+
+
+def test_size_is_recomputed_when_the_history_grows():
+    store = BoundedTaskStore()
+    task = make_task("t1")
+    store.put(task)
+    before = store.total_bytes
+    task.history.append(
+        Message(message_id="t1-a", role=Role.agent, parts=[text_part("x" * 1000)])
+    )
+    store.put(task)
+
+    assert store.total_bytes > before + 1000
+
+
+def test_least_recently_used_finished_task_is_evicted():
+    store = BoundedTaskStore(max_tasks=2)
+    store.put(finish(make_task("old")))
+    store.put(finish(make_task("recent")))
+    asyncio.run(store.get("old"))  # Now "recent" is the least recently used
+    store.put(finish(make_task("new")))
+
+    assert set(store._tasks) == {"old", "new"}
+    assert store.evictions["evicted"] == 1
+
+
+def test_running_tasks_are_not_evicted():
+    store = BoundedTaskStore(max_tasks=1)
+    store.put(make_task("a"))
+    store.put(make_task("b"))
+
+    assert len(store) == 2
+    assert store.evictions["over_limit_running"] == 1
+
+
+def test_byte_limit_evicts_finished_tasks():
+    store = BoundedTaskStore(max_bytes=3000)
+    for index in range(3):
+        store.put(finish(make_task(f"t{index}", chunks=["x" * 1000])))
+
+    assert store.total_bytes <= 3000
+    assert "t2" in store._tasks
+    assert store.evictions["evicted"] >= 1
+
+
+def test_finished_tasks_expire():
+    store = BoundedTaskStore(terminal_ttl=0.05)
+    store.put(finish(make_task("t1")))
+    time.sleep(0.1)
+
+    assert asyncio.run(store.get("t1")) is None
+    assert store.total_bytes == 0
+    assert store.evictions["expired"] == 1
+
+
+def test_abandoned_running_task_is_dropped():
+    # Regression: a task whose executor never sent a final status was kept forever
+    store = BoundedTaskStore(stale_ttl=0.2)
+    store.put(make_task("abandoned"))
+    live = make_task("live")
+    store.put(live)
+    time.sleep(0.12)
+    store.put(live)
+    time.sleep(0.12)
+
+    assert asyncio.run(store.get("abandoned")) is None
+    assert asyncio.run(store.get("live")) is not None
+    assert store.evictions["stale"] == 1
+    assert store.metrics()["task_store_running_tasks"] == 1
+
+
+def test_finishing_a_task_stops_the_stale_timer():
+    store = BoundedTaskStore(stale_ttl=0.05)
+    task = make_task("t1")
+    store.put(task)
+    store.put(finish(task))
+    time.sleep(0.1)
+
+    assert asyncio.run(store.get("t1")) is not None
+    assert store.evictions["stale"] == 0
@@ -0,0 +1,69 @@
+import time
+
+from ttl_cache import LRUTTLCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUTTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.keys() == ["a", "c"]
+    assert cache.stats.evictions == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = LRUTTLCache(ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=10)
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats.expirations == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_sliding_ttl_restarts_on_hit():
+    cache = LRUTTLCache(ttl=0.15, sliding=True)
+    cache.set("a", 1)
+    time.sleep(0.1)
+    assert cache.get("a") == 1
+    time.sleep(0.1)
+
+    assert cache.get("a") == 1
+
+
+def test_evicts_to_fit_max_bytes():
+    cache = LRUTTLCache(max_bytes=10, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    cache.set("c", "xxxx")
+
+    assert cache.keys() == ["b", "c"]
+    assert cache.total_bytes == 8
+
+
+def test_replacing_a_value_updates_total_bytes():
+    cache = LRUTTLCache(max_bytes=100, sizeof=len)
+    cache.set("a", "x" * 10)
+    cache.set("a", "x" * 3)
+
+    assert cache.total_bytes == 3
+    assert cache.pop("a") == "xxx"
+    assert cache.total_bytes == 0
+
+
+def test_oversized_value_drops_the_existing_entry():
+    cache = LRUTTLCache(max_bytes=10, sizeof=len)
+    cache.set("a", "old")
+    cache.set("b", "kept")
+    cache.set("a", "x" * 11)
+
+    # Never the old value: the caller didn't write it last
+    assert cache.get("a") is None
+    assert cache.get("b") == "kept"
+    assert cache.total_bytes == 4
+    assert cache.stats.oversized == 1